@@ -9,7 +9,7 @@ import sqlite3
 from enum import IntEnum
 from construct import core
 from abc import ABCMeta, abstractmethod
-from typing import Any,AnyStr,List,Tuple,Dict,NoReturn,Optional
+from typing import Any,AnyStr,List,Tuple,Dict,NoReturn,Optional,Iterable,Callable
 from datetime import datetime,timedelta,tzinfo 
 from calendar import timegm
 
@@ -501,6 +501,11 @@ class _AbstractLocalDatabaseClass(_AbstractDatabaseClass):
             # Прикрутить функцию поиска по регулярному выражению
             self._connection.create_function("REGEXP", 2, self._RegExp)
     
+    def CreateFunction(self,name:str,numParams:int,func:Callable) -> NoReturn:
+        if self._connection is not None:
+            # Пользовательская функция для использования в запросах
+            self._connection.create_function(name, numParams, func)
+    
     def ExecCommit(self,query:str,params:Any='') -> NoReturn:
         try:
             self._cursor.execute(query, params)
@@ -522,6 +527,10 @@ class _AbstractLocalDatabaseClass(_AbstractDatabaseClass):
     def Exec(self,query:str,params:Any='') -> NoReturn:
         self._cursor.execute(query, params)
         
+    def ExecMany(self,query:str,paramsSeq:Iterable) -> NoReturn:
+        # Пакетное выполнение одного запроса для набора параметров (в рамках текущей транзакции)
+        self._cursor.executemany(query, paramsSeq)
+        
     def Commit(self) -> NoReturn:
         self._connection.commit()
         
@@ -683,21 +692,22 @@ class SQLiteDatabaseInterface(SQLiteDatabaseInterfaceReader):
     
     def __SetConnection(self) -> Optional[sqlite3.Connection]:
         # Установить соединение в зависимости от потребностей модуля в RAM
+        # uri=True позволяет модулям подключать (ATTACH) исходные БД по URI только на чтение
         if self._RAMProcessing:
-            return sqlite3.connect(':memory:')
+            return sqlite3.connect(':memory:',uri=True)
       
         else: 
             if self._dbPath is not None:
                 try:
-                    conn = sqlite3.connect(self._dbPath)
+                    conn = sqlite3.connect(self._dbPath,uri=True)
                 except sqlite3.OperationalError: # ошибка подключения, проверить наличие каталога
                     try:
                         self._CheckCreateFolders()
                         conn = sqlite3.connect(database=self._dbPath,
-                                                   timeout=3.0)  
+                                                   timeout=3.0,uri=True)  
                     except sqlite3.OperationalError: # нет БД      
                         conn = None
-                    return conn
+                return conn
             else:
                 # Ошибка задания параметров подключения к файлу БД
                 message = 'Ошибка создания подключения к БД SQLite: Имя файла для сохранения БД задано неверно!'
@@ -3,8 +3,29 @@
 Общий модуль для поиска браузеров Chromium на системе
 """
 
+import functools
 import os
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Set
+
+# Каталог профилей браузеров, раскрывается один раз при загрузке модуля
+_CONFIG_DIR = os.path.expanduser('~/.config')
+
+
+def _scan_config_dir(config_dir: str) -> Set[str]:
+    """
+    Возвращает имена подкаталогов config_dir за одно чтение каталога
+    (вместо отдельного stat на каждый поддерживаемый браузер)
+    """
+    try:
+        with os.scandir(config_dir) as entries:
+            return {entry.name for entry in entries if entry.is_dir()}
+    except OSError:
+        return set()
+
+
+def clear_cache() -> None:
+    """Сбрасывает запомненные результаты поиска (например, после изменения ~/.config)"""
+    _find_browser_files.cache_clear()
 
 
 class BrowserFinder:
@@ -19,6 +40,11 @@ class BrowserFinder:
         ('brave', 'Brave')
     ]
     
+    @staticmethod
+    def clear_cache() -> None:
+        """Сбрасывает кэшированные результаты поиска браузеров"""
+        clear_cache()
+    
     @staticmethod
     def get_browser_paths(base_path: str, file_name: str) -> List[Tuple[str, str, str]]:
         """
@@ -31,20 +57,8 @@ class BrowserFinder:
         Returns:
             Список кортежей: (полный_путь_к_файлу, имя_браузера, папка_браузера)
         """
-        browser_paths = []
-        
-        for browser_folder, browser_name in BrowserFinder.SUPPORTED_BROWSERS:
-            full_path = os.path.join(
-                os.path.expanduser(base_path), 
-                browser_folder,
-                'Default',
-                file_name
-            )
-            
-            if os.path.exists(full_path):
-                browser_paths.append((full_path, browser_name, browser_folder))
-                
-        return browser_paths
+        # Результат поиска запоминается на весь запуск; сброс - BrowserFinder.clear_cache()
+        return list(_find_browser_files(base_path, file_name))
     
     @staticmethod
     def get_history_paths() -> List[Tuple[str, str, str]]:
@@ -84,20 +98,7 @@ class BrowserFinder:
         Returns:
             Список кортежей: (путь_к_extensions, имя_браузера, папка_браузера)
         """
-        browser_paths = []
-        
-        for browser_folder, browser_name in BrowserFinder.SUPPORTED_BROWSERS:
-            extensions_path = os.path.join(
-                os.path.expanduser('~/.config'), 
-                browser_folder,
-                'Default',
-                'Extensions'
-            )
-            
-            if os.path.exists(extensions_path):
-                browser_paths.append((extensions_path, browser_name, browser_folder))
-                
-        return browser_paths
+        return BrowserFinder.get_browser_paths('~/.config', 'Extensions')
     
     @staticmethod
     def find_browser_by_name(browser_name: str, file_type: str = 'History') -> Optional[str]:
@@ -106,19 +107,12 @@ class BrowserFinder:
         Returns:
             Путь к файлу или None если не найден
         """
-        browser_name_lower = browser_name.lower()
+        default_dir = _DEFAULT_DIR_BY_NAME.get(browser_name.lower())
+        if default_dir is None:
+            return None
         
-        for browser_folder, name in BrowserFinder.SUPPORTED_BROWSERS:
-            if name.lower() == browser_name_lower:
-                file_path = os.path.join(
-                    os.path.expanduser('~/.config'),
-                    browser_folder,
-                    'Default',
-                    file_type
-                )
-                return file_path if os.path.exists(file_path) else None
-                
-        return None
+        file_path = os.path.join(default_dir, file_type)
+        return file_path if os.path.exists(file_path) else None
     
     @staticmethod
     def get_all_available_browsers() -> List[str]:
@@ -128,18 +122,46 @@ class BrowserFinder:
         Returns:
             Список имен браузеров
         """
-        available_browsers = []
+        # Браузер считается установленным при наличии файла истории
+        return [browser_name for _, browser_name, _ in BrowserFinder.get_history_paths()]
+
+
+@functools.lru_cache(maxsize=32)
+def _find_browser_files(base_path: str, file_name: str) -> Tuple[Tuple[str, str, str], ...]:
+    """Поиск файлов браузеров; результат кэшируется до вызова clear_cache()"""
+    browser_paths = []
+    if base_path == '~/.config':
+        config_dir = _CONFIG_DIR
+        browser_defaults = _BROWSER_DEFAULTS
+    else:
+        config_dir = os.path.expanduser(base_path)
+        browser_defaults = _build_browser_defaults(config_dir)
+    present = _scan_config_dir(config_dir)
+    
+    for browser_folder, browser_name, default_dir in browser_defaults:
+        if browser_folder not in present:
+            continue
         
-        for browser_folder, browser_name in BrowserFinder.SUPPORTED_BROWSERS:
-            # Проверяем наличие хотя бы одного файла браузера
-            history_path = os.path.join(
-                os.path.expanduser('~/.config'),
-                browser_folder,
-                'Default',
-                'History'
-            )
+        full_path = os.path.join(default_dir, file_name)
+        if os.path.exists(full_path):
+            browser_paths.append((full_path, browser_name, browser_folder))
             
-            if os.path.exists(history_path):
-                available_browsers.append(browser_name)
-                
-        return available_browsers
\ No newline at end of file
+    return tuple(browser_paths)
+
+
+def _build_browser_defaults(config_dir: str) -> Tuple[Tuple[str, str, str], ...]:
+    """Строит таблицу (папка_браузера, имя_браузера, путь_к_профилю_Default)"""
+    return tuple(
+        (browser_folder, browser_name, os.path.join(config_dir, browser_folder, 'Default'))
+        for browser_folder, browser_name in BrowserFinder.SUPPORTED_BROWSERS
+    )
+
+
+# Таблица профилей по умолчанию, вычисляется один раз при загрузке модуля
+_BROWSER_DEFAULTS = _build_browser_defaults(_CONFIG_DIR)
+
+# Имя браузера в нижнем регистре -> путь к профилю Default
+_DEFAULT_DIR_BY_NAME = {
+    browser_name.lower(): default_dir
+    for _, browser_name, default_dir in _BROWSER_DEFAULTS
+}
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Общие утилиты для чтения SQLite баз браузеров
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+from typing import Optional, Tuple
+from urllib.request import pathname2url
+
+# Настройки соединения для чтения: кэш страниц 64 МиБ, mmap до 256 МиБ,
+# временные структуры в памяти, запрет записи
+_READ_PRAGMAS = (
+    "PRAGMA cache_size=-65536;"
+    "PRAGMA mmap_size=268435456;"
+    "PRAGMA temp_store=MEMORY;"
+    "PRAGMA query_only=1;"
+)
+
+# Сколько секунд ждать снятия блокировки файла браузером, прежде чем читать копию
+_LOCK_TIMEOUT = 0.5
+
+# Размер буфера для копирования файла, если копирование средствами ядра недоступно
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def readonly_uri(db_path: str) -> str:
+    """
+    Формирует URI для открытия БД только на чтение. Блокировки SQLite сохраняются:
+    если браузер держит файл заблокированным, чтение завершится ошибкой
+    "database is locked", а не вернет несогласованные данные
+    """
+    return f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+
+
+def connect_for_reading(db_path: str) -> sqlite3.Connection:
+    """Открывает БД только на чтение (mode=ro) и применяет _READ_PRAGMAS"""
+    conn = sqlite3.connect(readonly_uri(db_path), timeout=_LOCK_TIMEOUT, uri=True)
+    try:
+        conn.executescript(_READ_PRAGMAS)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def _fastcopy(src: str, dst: str) -> None:
+    """
+    Копирует файл с метаданными (аналог shutil.copy2).
+    Сначала пробует os.copy_file_range (копирование внутри ядра, Linux),
+    иначе копирует через переиспользуемый буфер в 1 МиБ
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        copied = False
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 2 ** 30):
+                    pass
+                copied = True
+            except OSError:
+                # Файловая система не поддерживает - начинаем заново обычным копированием
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+        
+        if not copied:
+            buffer = memoryview(bytearray(_COPY_BUFFER_SIZE))
+            while True:
+                size = fsrc.readinto(buffer)
+                if not size:
+                    break
+                fdst.write(buffer[:size])
+    
+    shutil.copystat(src, dst)
+
+
+def connect_readonly(db_path: str, temp_dir: str, temp_prefix: str) -> Tuple[sqlite3.Connection, Optional[str]]:
+    """
+    Открывает БД браузера только на чтение, без создания копии.
+    Если открыть или прочитать оригинал не удалось (например, файл заблокирован
+    запущенным браузером), создает временную копию в temp_dir и открывает ее.
+
+    Возвращает (подключение, путь к временной копии или None).
+    Временную копию должен удалить вызывающий код.
+    """
+    conn = None
+    try:
+        conn = connect_for_reading(db_path)
+        # Проверяем, что файл действительно читается
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        return conn, None
+    except sqlite3.OperationalError:
+        if conn is not None:
+            conn.close()
+
+    # Уникальное имя копии: файлы разных браузеров могут разбираться одновременно
+    fd, temp_path = tempfile.mkstemp(prefix=f'{temp_prefix}{os.path.basename(db_path)}_', dir=temp_dir)
+    os.close(fd)
+    try:
+        _fastcopy(db_path, temp_path)
+    except OSError:
+        os.remove(temp_path)
+        raise
+    return connect_for_reading(temp_path), temp_path
@@ -3,47 +3,107 @@
 Общие утилиты для работы со временем Chrome
 """
 
+import functools
 from datetime import datetime, timedelta
+from typing import Iterable, List, Union
 
 
-def convert_chrome_time(chrome_timestamp: int) -> str:
+# Chrome epoch: 1601-01-01
+_CHROME_EPOCH = datetime(1601, 1, 1)
+
+
+def convert_chrome_time(chrome_timestamp: Union[int, str]) -> str:
     """
     Конвертирует временную метку Chrome в читаемую дату.
     Chrome timestamp = микросекунды с 1601-01-01
     
     """
-    if not chrome_timestamp or chrome_timestamp == 0:
+    # В закладках время хранится как строка
+    if isinstance(chrome_timestamp, str):
+        try:
+            chrome_timestamp = int(chrome_timestamp)
+        except ValueError:
+            return ""
+    
+    if not chrome_timestamp:
         return ""
     
+    return _convert_chrome_time_cached(chrome_timestamp)
+
+
+@functools.lru_cache(maxsize=8192)
+def _convert_chrome_time_cached(chrome_timestamp: int) -> str:
+    """Конвертация с кэшированием: метки в cookies и закладках часто повторяются"""
     try:
-        # Chrome epoch: 1601-01-01
-        chrome_epoch = datetime(1601, 1, 1)
-        
         # Конвертируем микросекунды в секунды
         delta_seconds = chrome_timestamp / 1_000_000
         
         # Добавляем к Chrome epoch
-        result_time = chrome_epoch + timedelta(seconds=delta_seconds)
+        dt = _CHROME_EPOCH + timedelta(seconds=delta_seconds)
         
-        return result_time.strftime('%Y.%m.%d %H:%M:%S')
+        # Формат '%Y.%m.%d %H:%M:%S' без обращения к strftime
+        return f"{dt.year:04d}.{dt.month:02d}.{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
     
     except (ValueError, OverflowError, OSError):
         return ""
 
 
+# Секунды между Chrome epoch (1601-01-01) и Unix epoch (1970-01-01)
+_CHROME_TO_UNIX_SECONDS = 11644473600
+
+# Метка Chrome для 10000-01-01: более поздние даты datetime не поддерживает
+_CHROME_TIME_SQL_LIMIT = 265046774400000000
+
+
+def chrome_time_sql(column: str, fallback_function: str) -> str:
+    """
+    Возвращает SQL-выражение, конвертирующее столбец с меткой Chrome
+    так же, как convert_chrome_time.
+    Целые положительные метки конвертируются средствами SQLite (strftime),
+    остальные значения передаются в функцию fallback_function,
+    зарегистрированную на подключении (обычно это сама convert_chrome_time).
+    Метки с долей секунды близкой к единице тоже уходят в fallback_function:
+    convert_chrome_time делит во float и может округлить их до следующей секунды
+    
+    """
+    return (
+        f"CASE WHEN typeof({column}) = 'integer' AND {column} > 0 AND {column} < {_CHROME_TIME_SQL_LIMIT} "
+        f"AND {column} % 1000000 < 999000 "
+        f"THEN strftime('%Y.%m.%d %H:%M:%S', {column} / 1000000 - {_CHROME_TO_UNIX_SECONDS}, 'unixepoch') "
+        f"ELSE {fallback_function}({column}) END"
+    )
+
+
+def convert_chrome_time_batch(chrome_timestamps: Iterable[int]) -> List[str]:
+    """
+    Пакетная конвертация временных меток Chrome.
+    Каждое уникальное значение конвертируется один раз
+    
+    """
+    timestamps = list(chrome_timestamps)
+    converted = {ts: convert_chrome_time(ts) for ts in set(timestamps)}
+    return [converted[ts] for ts in timestamps]
+
+
 # Функции из cookies модуля
+_COOKIE_TYPE_SESSION = "Сессионный"
+_COOKIE_TYPE_PERSISTENT = "Постоянный"
+_PRIORITY_MAP = {0: "Низкий", 1: "Средний", 2: "Высокий"}
+_SAMESITE_MAP = {-1: "Не задано", 0: "Не задано", 1: "Lax", 2: "Strict", 3: "None"}
+
+
 def get_cookie_type(is_persistent: int) -> str:
     """Определяет тип cookie"""
-    return "Сессионный" if not is_persistent else "Постоянный"
+    if is_persistent:
+        return _COOKIE_TYPE_PERSISTENT
+    return _COOKIE_TYPE_SESSION
 
 
 def get_priority_text(priority: int) -> str:
     """Возвращает текстовое представление приоритета cookie"""
-    priority_map = {0: "Низкий", 1: "Средний", 2: "Высокий"}
-    return priority_map.get(priority, "Неизвестно")
+    return _PRIORITY_MAP.get(priority, "Неизвестно")
 
 
 def get_samesite_text(samesite: int) -> str:
     """Возвращает текстовое представление SameSite cookie"""
-    samesite_map = {-1: "Не задано", 0: "Не задано", 1: "Lax", 2: "Strict", 3: "None"}
-    return samesite_map.get(samesite, "Неизвестно")
\ No newline at end of file
+    return _SAMESITE_MAP.get(samesite, "Неизвестно")
@@ -24,6 +24,10 @@ class LogInterface():
         
     def Info(self,sourceName,message):
         logging.info(f'{sourceName}: {message}')
+
+    def Debug(self,sourceName,message):
+        # Отладочные сообщения; при уровне журнала INFO не записываются
+        logging.debug(f'{sourceName}: {message}')
             
     @staticmethod
     def DeathRattle(exc_type,exc_value,exc_traceback):
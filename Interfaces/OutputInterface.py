@@ -6,7 +6,7 @@
 
 from abc import ABCMeta, abstractmethod
 import itertools,sqlite3
-from typing import Any,AnyStr,List,Tuple,Dict,NoReturn,Optional
+from typing import Any,AnyStr,List,Tuple,Dict,NoReturn,Optional,Iterable
 
 #------------------------------------------------------------------------------
 class _AbstractOutputWriter():
@@ -44,6 +44,16 @@ class SQLiteDBOutputWriter(_AbstractOutputWriter):
         self._dbConnection:sqlite3.Connection = None
         self._dbName:str = paths.get('DBNAME','')
         self._tempTables:list = []
+        self._insertQuery:str = ''
+        
+    def SetFields(self,fieldsDescription:dict,recordFields:dict) -> NoReturn:
+        super().SetFields(fieldsDescription,recordFields)
+        # Запрос вставки записи формируется один раз для набора полей
+        self._insertQuery = str('INSERT INTO Data('
+                                f'{self._fieldsStr}'
+                                ') VALUES (' +
+                                str('?,'*len(self._recordFields.keys())).rstrip(',') + 
+                                ');')
         
     def SetDBConnection(self,conn:sqlite3.Connection) -> NoReturn:
         self._dbConnection = conn
@@ -131,16 +141,40 @@ class SQLiteDBOutputWriter(_AbstractOutputWriter):
         if self._dbConnection is None:
             return
 
+        if autoCommit is False:
+            self._dbConnection.Exec(self._insertQuery,recordInfo)
+        else:
+            self._dbConnection.ExecCommit(self._insertQuery,recordInfo)
+
+    def WriteRecords(self,records:Iterable,autoCommit:bool=True,batchSize:int=10000) -> NoReturn:
+        # Пакетная запись: INSERT через executemany порциями по batchSize записей,
+        # одна фиксация транзакции на порцию
+        if self._dbConnection is None:
+            return
+
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records,batchSize))
+            if not batch:
+                break
+            self._dbConnection.ExecMany(self._insertQuery,batch)
+            if autoCommit is True:
+                self._dbConnection.Commit()
+
+    def WriteRecordsFromQuery(self,selectQuery:str,params:Any='',autoCommit:bool=True) -> int:
+        # Запись результата SELECT одним запросом INSERT ... SELECT внутри SQLite,
+        # столбцы выборки должны идти в порядке полей записи. Возвращает число записей
+        if self._dbConnection is None:
+            return 0
+
         query = str('INSERT INTO Data('
                     f'{self._fieldsStr}'
-                    ') VALUES (' +
-                    str('?,'*len(self._recordFields.keys())).rstrip(',') + 
-                    ');')
+                    ') ' + selectQuery)
 
-        if autoCommit is False:
-            self._dbConnection.Exec(query,recordInfo)
-        else:
-            self._dbConnection.ExecCommit(query,recordInfo)
+        self._dbConnection.Exec(query,params)
+        if autoCommit is True:
+            self._dbConnection.Commit()
+        return self._dbConnection.Fetch('SELECT changes();')[0][0]
        
     def WriteMeta(self) -> NoReturn:
         if self._dbConnection is None:
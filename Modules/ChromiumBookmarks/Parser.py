@@ -3,113 +3,151 @@
 Модуль обработки закладок браузера Chromium
 """
 import os, json
-from typing import Dict, List, Tuple
+from collections import namedtuple
+from typing import Dict, Iterator, List, Tuple
 from datetime import datetime
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from Common.time_utils import convert_chrome_time
 
+# Пробуем импортировать orjson (быстрый разбор JSON)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Пробуем импортировать ijson (потоковый разбор больших файлов)
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Порог размера файла закладок, начиная с которого JSON разбирается потоково
+_STREAMING_THRESHOLD = 5 * 1024 * 1024
+
+# Запись закладки; порядок полей совпадает со столбцами таблицы Data
+Bookmark = namedtuple('Bookmark', [
+    'UserName', 'Browser', 'Folder', 'Title', 'URL',
+    'DateAddedUTC', 'DateAdded', 'DateModifiedUTC', 'DateModified', 'DataSource'
+])
+
+# Отображаемые названия корневых папок закладок
+_FOLDER_NAME_MAP = {
+    'bookmark_bar': 'Панель закладок',
+    'other': 'Другие закладки', 
+    'synced': 'Синхронизированные'
+}
+
 class Parser:
     def __init__(self, parameters: dict):  
         self.__parameters = parameters
         
     def _process_bookmark_node(self, node: dict, current_path: str, browser_name: str, data_source: str) -> List[Tuple]:
-        """Обрабатывает узел закладки (рекурсивно) - теперь в основном классе"""
+        """Обходит дерево закладок (итеративно, через явный стек) - теперь в основном классе"""
         results = []
+        username = self.__parameters.get('USERNAME', 'Unknown')
         
-        if not node:
-            return results
-            
-        node_type = node.get('type')
-        
-        if node_type == 'url':
-            # Это закладка - добавляем в результаты
-            try:
-                # Конвертируем время (оно может быть строкой!)
-                date_added = node.get('date_added', 0)
-                date_modified = node.get('date_modified', 0)
-                
-                # Если время строка - конвертируем в int
-                if isinstance(date_added, str):
-                    date_added = int(date_added) if date_added and date_added != '0' else 0
-                if isinstance(date_modified, str):
-                    date_modified = int(date_modified) if date_modified and date_modified != '0' else 0
-                
-                bookmark = (
-                    self.__parameters.get('USERNAME', 'Unknown'),  # временно фиксированное имя
-                    browser_name,
-                    current_path,
-                    node.get('name', 'Без имени'),
-                    node.get('url', ''),
-                    date_added,
-                    convert_chrome_time(date_added),
-                    date_modified,
-                    convert_chrome_time(date_modified),
-                    data_source
-                )
-                results.append(bookmark)
-                print(f"Добавлена закладка: {node.get('name')}")
-                
-            except Exception as e:
-                print(f"Ошибка обработки закладки {node.get('name')}: {e}")
+        # Стек пар (узел, путь); дети кладутся в обратном порядке, чтобы сохранить порядок обхода
+        stack = [(node, current_path)]
+        
+        while stack:
+            node, current_path = stack.pop()
+            if not node:
+                continue
                 
-        elif node_type == 'folder':
-            folder_name = node.get('name', 'Без имени')
-            new_path = f"{current_path}/{folder_name}"
+            node_type = node.get('type')
             
-            for child in node.get('children', []):
-                child_results = self._process_bookmark_node(child, new_path, browser_name, data_source)
-                results.extend(child_results)
+            if node_type == 'url':
+                # Это закладка - добавляем в результаты
+                try:
+                    # Конвертируем время (оно может быть строкой!)
+                    date_added = node.get('date_added', 0)
+                    date_modified = node.get('date_modified', 0)
+                    
+                    # Если время строка - конвертируем в int
+                    if isinstance(date_added, str):
+                        date_added = int(date_added) if date_added and date_added != '0' else 0
+                    if isinstance(date_modified, str):
+                        date_modified = int(date_modified) if date_modified and date_modified != '0' else 0
+                    
+                    results.append(Bookmark._make((
+                        username,
+                        browser_name,
+                        current_path,
+                        node.get('name', 'Без имени'),
+                        node.get('url', ''),
+                        date_added,
+                        convert_chrome_time(date_added),
+                        date_modified,
+                        convert_chrome_time(date_modified),
+                        data_source
+                    )))
+                    
+                except Exception as e:
+                    self.__parameters.get('LOG').Warn('ChromiumBookmarks', f"Ошибка обработки закладки {node.get('name')}: {e}")
+                    
+            elif node_type == 'folder':
+                new_path = f"{current_path}/{node.get('name', 'Без имени')}"
+                
+                for child in reversed(node.get('children', [])):
+                    stack.append((child, new_path))
                 
         return results
         
+    def _iter_bookmark_roots(self, bookmarks_path: str) -> Iterator[Tuple[str, dict]]:
+        """Возвращает пары (имя, узел) корневых папок файла закладок"""
+        if IJSON_AVAILABLE and os.path.getsize(bookmarks_path) > _STREAMING_THRESHOLD:
+            # Большой файл: в памяти держится только текущая корневая папка
+            self.__parameters.get('LOG').Debug('ChromiumBookmarks', f'Потоковый разбор JSON из {bookmarks_path}')
+            with open(bookmarks_path, 'rb') as f:
+                yield from ijson.kvitems(f, 'roots')
+            return
+        
+        if ORJSON_AVAILABLE:
+            with open(bookmarks_path, 'rb') as f:
+                bookmarks_data = orjson.loads(f.read())
+        else:
+            with open(bookmarks_path, 'r', encoding='utf-8') as f:
+                bookmarks_data = json.load(f)
+        
+        self.__parameters.get('LOG').Debug('ChromiumBookmarks', f'Успешно загружен JSON из {bookmarks_path}')
+        
+        roots = bookmarks_data.get('roots', {})
+        self.__parameters.get('LOG').Debug('ChromiumBookmarks', f'Найдено корневых элементов: {list(roots.keys())}')
+        yield from roots.items()
+        
     def _parse_chrome_bookmarks(self, bookmarks_path: str, browser_name: str) -> List[Tuple]:
         """Парсинг закладок браузера - теперь в основном классе"""
         results = []
         
         if not os.path.exists(bookmarks_path):
-            print(f"Файл закладок не найден: {bookmarks_path}")
+            self.__parameters.get('LOG').Debug('ChromiumBookmarks', f'Файл закладок не найден: {bookmarks_path}')
             return results
             
         try:
-            with open(bookmarks_path, 'r', encoding='utf-8') as f:
-                bookmarks_data = json.load(f)
-            
-            print(f"Успешно загружен JSON из {bookmarks_path}")
-            
-            # Парсим корневые элементы
-            roots = bookmarks_data.get('roots', {})
-            print(f"Найдено корневых элементов: {list(roots.keys())}")
-            
             # Обрабатываем все корневые папки
-            for root_name, root_node in roots.items():
+            for root_name, root_node in self._iter_bookmark_roots(bookmarks_path):
                 if root_node:
-                    folder_name = {
-                        'bookmark_bar': 'Панель закладок',
-                        'other': 'Другие закладки', 
-                        'synced': 'Синхронизированные'
-                    }.get(root_name, root_name)
+                    folder_name = _FOLDER_NAME_MAP.get(root_name, root_name)
                     
                     # Рекурсивно обрабатываем все вложенные элементы
                     bookmarks_in_folder = self._process_bookmark_node(
                         root_node, folder_name, browser_name, bookmarks_path
                     )
                     results.extend(bookmarks_in_folder)
-                    print(f"В папке '{folder_name}' найдено закладок: {len(bookmarks_in_folder)}")
+                    self.__parameters.get('LOG').Debug('ChromiumBookmarks', f"В папке '{folder_name}' найдено закладок: {len(bookmarks_in_folder)}")
             
-            print(f"Всего найдено закладок: {len(results)}")
+            self.__parameters.get('LOG').Debug('ChromiumBookmarks', f'Всего найдено закладок: {len(results)}')
                     
         except Exception as e:
-            print(f"Ошибка парсинга закладок: {e}")
-            import traceback
-            traceback.print_exc()
+            self.__parameters.get('LOG').Error('ChromiumBookmarks', f'Ошибка парсинга закладок: {e}')
                 
         return results
 
     async def Start(self) -> Dict:
-        print("=== BOOKMARKS PARSER ЗАПУЩЕН ===")
-        
         output_writer = self.__parameters.get('OUTPUTWRITER')
         
         # Структура полей для БД
@@ -144,22 +182,16 @@ class Parser:
         output_writer.CreateDatabaseTables()
         
         # Тестовый парсинг
-        bookmarks_path = os.path.expanduser('~/.config/google-chrome/Default/Bookmarks')
         bookmarks_path = os.path.expanduser('~/.config/chromium/Default/Bookmarks')
         
         if os.path.exists(bookmarks_path):
             records = self._parse_chrome_bookmarks(bookmarks_path, 'Google Chrome')
-            print(f"Итоговое количество закладок: {len(records)}")
+            self.__parameters.get('LOG').Debug('ChromiumBookmarks', f'Итоговое количество закладок: {len(records)}')
             
             # Запись результатов
-            for record in records:
-                output_writer.WriteRecord(record)
-            
-            # Покажем первые 5 закладок
-            for i, record in enumerate(records[:5]):
-                print(f"{i+1}. [{record[2]}] {record[3]} - {record[4]}")
+            output_writer.WriteRecords(records)
         else:
-            print("Файл закладок не найден")
+            self.__parameters.get('LOG').Debug('ChromiumBookmarks', 'Файл закладок не найден')
         
         # Завершение работы
         output_writer.RemoveTempTables()
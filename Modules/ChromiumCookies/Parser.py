@@ -2,30 +2,136 @@
 """
 Модуль обработки cookies браузера Chromium
 """
-import os, sqlite3, shutil
-import json, base64
-from typing import Dict, List, Tuple
-from datetime import datetime
+import os, sqlite3
+import asyncio, itertools, threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from Common.time_utils import (
     convert_chrome_time, 
-    get_cookie_type, 
-    get_priority_text, 
-    get_samesite_text
+    convert_chrome_time_batch,
+    chrome_time_sql
 )
 from Common.browser_finder import BrowserFinder
+from Common.sqlite_utils import connect_for_reading, connect_readonly, readonly_uri
 
-from Common.time_utils import convert_chrome_time
+# Размер порции строк при чтении таблицы cookies
+_FETCH_BATCH_SIZE = 1000
+
+# Префиксы значений, зашифрованных AES-GCM (v20 - app-bound шифрование Chrome 127+)
+_ENCRYPTED_PREFIXES = (b'v10', b'v11', b'v20')
+
+# Байты, не являющиеся печатаемыми ASCII-символами или пробельными;
+# bytes.translate удаляет их, оставляя только "текстовые" байты
+_NON_TEXT_BYTES = bytes(
+    b for b in range(256)
+    if b >= 0x80 or not (chr(b).isprintable() or chr(b).isspace())
+)
+
+# Запись cookie; порядок полей совпадает со столбцами таблицы Data
+CookieRow = namedtuple('CookieRow', [
+    'UserName', 'Browser', 'Host', 'CookieName', 'CookieValue', 'Path',
+    'CreationUTC', 'CreationDate', 'ExpiresUTC', 'ExpiresDate',
+    'LastAccessUTC', 'LastAccessDate', 'LastUpdateUTC', 'LastUpdateDate',
+    'IsSecure', 'IsHttpOnly', 'CookieType', 'Priority', 'SameSite', 'DataSource'
+])
+
+# Текстовые значения перечислений (см. get_cookie_type/get_priority_text/get_samesite_text),
+# вычисляемые на стороне SQLite
+_COOKIE_TYPE_SQL = "CASE WHEN is_persistent THEN 'Постоянный' ELSE 'Сессионный' END"
+_PRIORITY_SQL = """CASE priority
+                    WHEN 0 THEN 'Низкий'
+                    WHEN 1 THEN 'Средний'
+                    WHEN 2 THEN 'Высокий'
+                    ELSE 'Неизвестно'
+                END"""
+_SAMESITE_SQL = """CASE samesite
+                    WHEN -1 THEN 'Не задано'
+                    WHEN 0 THEN 'Не задано'
+                    WHEN 1 THEN 'Lax'
+                    WHEN 2 THEN 'Strict'
+                    WHEN 3 THEN 'None'
+                    ELSE 'Неизвестно'
+                END"""
+
+# Имя, под которым файл cookies подключается (ATTACH) к выходной БД
+_SOURCE_SCHEMA = 'cookies_source'
+
+# Выборка cookies для разбора в Python (замена NULL, приведение флагов к 0/1
+# и текстовые значения перечислений вычисляются на стороне SQLite)
+_COOKIES_SELECT_SQL = f"""
+    SELECT 
+        IFNULL(creation_utc, 0),
+        IFNULL(host_key, ''),
+        IFNULL(name, ''), 
+        value,
+        encrypted_value,
+        IFNULL(path, ''),
+        IFNULL(expires_utc, 0),
+        IFNULL(is_secure, 0) != 0,
+        IFNULL(is_httponly, 0) != 0,
+        IFNULL(last_access_utc, 0),
+        has_expires,
+        {_COOKIE_TYPE_SQL},
+        {_PRIORITY_SQL},
+        {_SAMESITE_SQL},
+        IFNULL(last_update_utc, 0)
+    FROM cookies 
+    ORDER BY last_access_utc DESC
+    """
+
+# Выборка cookies для переноса в выходную БД запросом INSERT ... SELECT;
+# данные браузера (пользователь, имя, путь к файлу) передаются параметрами
+_COOKIES_TRANSFER_SQL = f"""
+    SELECT 
+        ?,
+        ?,
+        IFNULL(host_key, ''),
+        IFNULL(name, ''),
+        CASE WHEN value != '' THEN value
+             ELSE cookie_value(IFNULL(name, ''), IFNULL(host_key, ''), value, encrypted_value)
+        END,
+        IFNULL(path, ''),
+        IFNULL(creation_utc, 0),
+        {chrome_time_sql('IFNULL(creation_utc, 0)', 'chrome_time')},
+        IFNULL(expires_utc, 0),
+        {chrome_time_sql('IFNULL(expires_utc, 0)', 'chrome_time')},
+        IFNULL(last_access_utc, 0),
+        {chrome_time_sql('IFNULL(last_access_utc, 0)', 'chrome_time')},
+        IFNULL(last_update_utc, 0),
+        {chrome_time_sql('IFNULL(last_update_utc, 0)', 'chrome_time')},
+        IFNULL(is_secure, 0) != 0,
+        IFNULL(is_httponly, 0) != 0,
+        {_COOKIE_TYPE_SQL},
+        {_PRIORITY_SQL},
+        {_SAMESITE_SQL},
+        ?
+    FROM {_SOURCE_SCHEMA}.cookies 
+    ORDER BY last_access_utc DESC
+    """
 
 # Пробуем импортировать browser-cookie3
 try:
     import browser_cookie3
     BROWSER_COOKIE3_AVAILABLE = True
-    print("[INFO] browser-cookie3 доступен, будет использован для дешифровки")
 except ImportError:
     BROWSER_COOKIE3_AVAILABLE = False
-    print("[INFO] browser-cookie3 не установлен, дешифровка будет ограничена")
+
+
+# Семейства браузеров в порядке проверки имени; имя семейства совпадает
+# с функцией загрузки в browser-cookie3
+_BROWSER_FAMILIES = ('chrome', 'chromium', 'edge', 'opera', 'brave')
+
+
+def _get_browser_family(browser_name: str) -> str:
+    """Определяет семейство браузера (функцию browser-cookie3) по имени"""
+    browser_name_lower = browser_name.lower()
+    for family in _BROWSER_FAMILIES:
+        if family in browser_name_lower:
+            return family
+    return 'chrome'  # По умолчанию
 
 
 class CookieDecryptor:
@@ -33,55 +139,53 @@ class CookieDecryptor:
     
     def __init__(self, parameters: dict):
         self.__parameters = parameters
-        self.__decrypted_cookies_cache = {}  # Кэш для cookies из browser-cookie3
+        self.log = parameters.get('LOG')
+        self.__decrypted_cookies_cache = {}  # Кэш cookies из browser-cookie3 по семейству браузера
+        self.__cache_lock = threading.Lock()  # Cookies браузеров загружаются в параллельных потоках
+        self.__family_locks = {}  # Загрузка одного семейства выполняется только один раз
         
-    def _get_decrypted_cookies(self, browser_name: str) -> Dict[str, str]:
+    def _get_decrypted_cookies(self, browser_name: str) -> Dict[Tuple[str, str], str]:
         """
         Получает расшифрованные cookies через browser-cookie3
+        (один вызов на семейство браузера, независимо от числа профилей)
         """
-        cache_key = browser_name.lower()
-        if cache_key in self.__decrypted_cookies_cache:
-            return self.__decrypted_cookies_cache[cache_key]
-        
-        decrypted_cookies = {}
-        
         if not BROWSER_COOKIE3_AVAILABLE:
             self.__parameters.get('LOG').Warn('ChromiumCookies',
                 'browser-cookie3 не доступен, дешифровка невозможна')
-            return decrypted_cookies
+            return {}
         
-        try:
-            self.__parameters.get('LOG').Info('ChromiumCookies',
-                f'Получение cookies через browser-cookie3 для {browser_name}')
-            
-            # Выбираем правильный метод для браузера
-            if 'chrome' in browser_name.lower():
-                cj = browser_cookie3.chrome()
-            elif 'chromium' in browser_name.lower():
-                cj = browser_cookie3.chromium()
-            elif 'edge' in browser_name.lower():
-                cj = browser_cookie3.edge()
-            elif 'opera' in browser_name.lower():
-                cj = browser_cookie3.opera()
-            elif 'brave' in browser_name.lower():
-                cj = browser_cookie3.brave()
-            else:
-                cj = browser_cookie3.chrome()  # По умолчанию
+        family = _get_browser_family(browser_name)
+        with self.__cache_lock:
+            if family in self.__decrypted_cookies_cache:
+                return self.__decrypted_cookies_cache[family]
+            family_lock = self.__family_locks.setdefault(family, threading.Lock())
+        
+        with family_lock:
+            # Пока ждали блокировку, cookies могли загрузить в другом потоке
+            with self.__cache_lock:
+                if family in self.__decrypted_cookies_cache:
+                    return self.__decrypted_cookies_cache[family]
             
-            # Создаем словарь для быстрого поиска: ключ = "host_key|name"
-            for cookie in cj:
-                key = f"{cookie.domain}|{cookie.name}"
-                decrypted_cookies[key] = cookie.value
-            
-            self.__parameters.get('LOG').Info('ChromiumCookies',
-                f'Получено {len(decrypted_cookies)} расшифрованных cookies через browser-cookie3')
+            decrypted_cookies = {}
+            try:
+                self.__parameters.get('LOG').Info('ChromiumCookies',
+                    f'Получение cookies через browser-cookie3 для {browser_name}')
+                
+                cj = getattr(browser_cookie3, family)()
+                
+                # Создаем словарь для быстрого поиска: ключ = (host_key, name)
+                decrypted_cookies = {(cookie.domain, cookie.name): cookie.value for cookie in cj}
+                
+                self.__parameters.get('LOG').Info('ChromiumCookies',
+                    f'Получено {len(decrypted_cookies)} расшифрованных cookies через browser-cookie3')
+                
+            except Exception as e:
+                self.__parameters.get('LOG').Error('ChromiumCookies',
+                    f'Ошибка получения cookies через browser-cookie3: {e}')
             
-        except Exception as e:
-            self.__parameters.get('LOG').Error('ChromiumCookies',
-                f'Ошибка получения cookies через browser-cookie3: {e}')
-        
-        self.__decrypted_cookies_cache[cache_key] = decrypted_cookies
-        return decrypted_cookies
+            with self.__cache_lock:
+                self.__decrypted_cookies_cache[family] = decrypted_cookies
+            return decrypted_cookies
     
     def _decrypt_cookie_value(self, encrypted_value: bytes, cookies_path: str = None) -> str:
         """
@@ -91,20 +195,23 @@ class CookieDecryptor:
             return ''
             
         try:
+            # Зашифрованное значение распознается по префиксу - декодировать его не нужно
+            # (значение не типа BLOB вызывает исключение и считается бинарными данными)
+            if encrypted_value.startswith(_ENCRYPTED_PREFIXES):
+                # На Linux дешифровка сложна, возвращаем информацию
+                return f"[зашифровано AES-GCM v{encrypted_value[1:3].decode()}: {len(encrypted_value)} байт]"
+            
             # Пробуем просто декодировать как текст
             decoded = encrypted_value.decode('utf-8', errors='ignore')
             
             # Если это читаемый текст и не начинается с v10/v11, возвращаем его
-            if decoded and len(decoded) > 0 and not decoded.startswith(('v10', 'v11')):
-                # Проверяем, есть ли печатаемые символы
-                if any(c.isprintable() or c.isspace() for c in decoded[:100]):
+            if decoded and not decoded.startswith(('v10', 'v11')):
+                # Печатаемый ASCII-байт в первых 100 байтах всегда попадает в decoded[:100],
+                # поэтому посимвольная проверка нужна только для не-ASCII данных
+                if (encrypted_value[:100].translate(None, _NON_TEXT_BYTES)
+                        or any(c.isprintable() or c.isspace() for c in decoded[:100])):
                     return decoded[:500]  # Ограничиваем длину
             
-            # Если данные начинаются с v10 или v11
-            if encrypted_value.startswith(b'v10') or encrypted_value.startswith(b'v11'):
-                # На Linux дешифровка сложна, возвращаем информацию
-                return f"[зашифровано AES-GCM v{encrypted_value[1:3].decode()}: {len(encrypted_value)} байт]"
-            
             # Для других бинарных данных
             return f"[бинарные данные: {len(encrypted_value)} байт]"
                 
@@ -119,7 +226,7 @@ class CookieValueResolver:
         self.cookie_decryptor = cookie_decryptor
         
     def get_cookie_value(self, name: str, host_key: str, value: str, 
-                         encrypted_value: bytes, decrypted_cookies: Dict[str, str],
+                         encrypted_value: bytes, decrypted_cookies: Dict[Tuple[str, str], str],
                          cookies_path: str = None) -> str:
         """
         Определяет значение cookie, пытаясь дешифровать если нужно
@@ -130,11 +237,11 @@ class CookieValueResolver:
         
         # Пробуем найти в расшифрованных cookies из browser-cookie3
         if name and host_key:
-            lookup_key = f"{host_key}|{name}"
-            if lookup_key in decrypted_cookies:
-                self.cookie_decryptor._parameters.get('LOG').Info('ChromiumCookies',
+            decrypted_value = decrypted_cookies.get((host_key, name))
+            if decrypted_value is not None:
+                self.cookie_decryptor.log.Info('ChromiumCookies',
                     f'Найдено расшифрованное значение для {name} через browser-cookie3')
-                return decrypted_cookies[lookup_key]
+                return decrypted_value
         
         # Если есть зашифрованное значение, но не нашли в browser-cookie3
         if encrypted_value:
@@ -154,139 +261,170 @@ class CookiesFileParser:
     
     def parse_cookies_file(self, cookies_path: str, browser_name: str) -> List[Tuple]:
         """Парсинг cookies браузера"""
-        results = []
+        return list(self.iter_cookies_file(cookies_path, browser_name))
+    
+    def iter_cookies_file(self, cookies_path: str, browser_name: str) -> Iterator[Tuple]:
+        """Потоковый парсинг cookies браузера: записи выдаются по мере чтения"""
+        return itertools.chain.from_iterable(self.iter_cookies_batches(cookies_path, browser_name))
+    
+    def iter_cookies_batches(self, cookies_path: str, browser_name: str) -> Iterator[List[Tuple]]:
+        """Парсинг cookies браузера порциями по _FETCH_BATCH_SIZE записей"""
+        records_count = 0
         
         # Получаем расшифрованные cookies через browser-cookie3
         decrypted_cookies = self.cookie_value_resolver.cookie_decryptor._get_decrypted_cookies(browser_name)
         
-        if not os.path.exists(cookies_path):
-            print(f"[DEBUG] Файл не найден: {cookies_path}")
-            return results
-            
-        print(f"[DEBUG] Начинаем парсинг: {cookies_path}")
+        # Существование файла уже проверено BrowserFinder (единственный stat на путь)
+        self.__parameters.get('LOG').Debug('ChromiumCookies', f'Начинаем парсинг: {cookies_path}')
             
-        # Создаем временную копию для избежания блокировки
-        temp_dir = self.__parameters.get('TEMP')
-        temp_path = os.path.join(temp_dir, f'temp_cookies_{os.path.basename(cookies_path)}')
+        # Открываем оригинал только на чтение; копия создается лишь при ошибке открытия
+        conn = None
+        temp_path = None
         
         try:
-            shutil.copy2(cookies_path, temp_path)
-            print(f"[DEBUG] Создана временная копия: {temp_path}")
-            
-            conn = sqlite3.connect(temp_path)
+            conn, temp_path = connect_readonly(cookies_path, self.__parameters.get('TEMP'), 'temp_cookies_')
+            if temp_path:
+                self.__parameters.get('LOG').Debug('ChromiumCookies', f'Создана временная копия: {temp_path}')
             cursor = conn.cursor()
             
             # Проверяем существование таблицы cookies
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='cookies'")
             if not cursor.fetchone():
-                print("[DEBUG] Таблица 'cookies' не найдена в базе")
-                return results
+                self.__parameters.get('LOG').Debug('ChromiumCookies', "Таблица 'cookies' не найдена в базе")
+                return
             
             # Получаем cookies - включаем encrypted_value
-            query = """
-            SELECT 
-                creation_utc,
-                host_key,
-                name, 
-                value,
-                encrypted_value,
-                path,
-                expires_utc,
-                is_secure,
-                is_httponly,
-                last_access_utc,
-                has_expires,
-                is_persistent,
-                priority,
-                samesite,
-                last_update_utc
-            FROM cookies 
-            ORDER BY last_access_utc DESC
-            """
+            cursor.execute(_COOKIES_SELECT_SQL)
             
-            cursor.execute(query)
+            # Постоянные для всего файла значения и функции - в локальные переменные
+            username = self.__parameters.get('USERNAME', 'Unknown')
+            get_value = self.cookie_value_resolver.get_cookie_value
+            make_record = CookieRow._make
             
-            for row in cursor.fetchall():
-                try:
-                    # Безопасное извлечение по индексам
-                    creation_utc = row[0] if len(row) > 0 else 0
-                    host_key = row[1] if len(row) > 1 else ''
-                    name = row[2] if len(row) > 2 else ''
-                    value = row[3] if len(row) > 3 else ''
-                    encrypted_value = row[4] if len(row) > 4 else b''
-                    path = row[5] if len(row) > 5 else ''
-                    expires_utc = row[6] if len(row) > 6 else 0
-                    is_secure = row[7] if len(row) > 7 else 0
-                    is_httponly = row[8] if len(row) > 8 else 0
-                    last_access_utc = row[9] if len(row) > 9 else 0
-                    has_expires = row[10] if len(row) > 10 else 0
-                    is_persistent = row[11] if len(row) > 11 else 0
-                    priority = row[12] if len(row) > 12 else 0
-                    samesite = row[13] if len(row) > 13 else 0
-                    last_update_utc = row[14] if len(row) > 14 else 0
-        
-                except IndexError:
-                    continue
-                
-                # Определяем фактическое значение cookie
-                cookie_value = self.cookie_value_resolver.get_cookie_value(
-                    name, host_key, value, encrypted_value, 
-                    decrypted_cookies, cookies_path
-                )
+            # Читаем строки порциями, не материализуя всю таблицу
+            while True:
+                rows = cursor.fetchmany(_FETCH_BATCH_SIZE)
+                if not rows:
+                    break
                 
-                # Конвертируем временные метки
-                creation_date = convert_chrome_time(creation_utc)
-                expires_date = convert_chrome_time(expires_utc)
-                last_access_date = convert_chrome_time(last_access_utc)
-                last_update_date = convert_chrome_time(last_update_utc)
+                batch = []
+                # Конвертируем временные метки пакетно по столбцам
+                creation_dates = convert_chrome_time_batch(row[0] for row in rows)
+                expires_dates = convert_chrome_time_batch(row[6] for row in rows)
+                last_access_dates = convert_chrome_time_batch(row[9] for row in rows)
+                last_update_dates = convert_chrome_time_batch(row[14] for row in rows)
                 
-                # Определяем тип cookie и другие свойства
-                cookie_type = get_cookie_type(is_persistent)
-                priority_text = get_priority_text(priority)
-                samesite_text = get_samesite_text(samesite)
+                for row, creation_date, expires_date, last_access_date, last_update_date in zip(
+                        rows, creation_dates, expires_dates, last_access_dates, last_update_dates):
+                    # Состав столбцов фиксирован запросом выше
+                    (creation_utc, host_key, name, value, encrypted_value, path,
+                     expires_utc, is_secure, is_httponly, last_access_utc, has_expires,
+                     cookie_type, priority_text, samesite_text, last_update_utc) = row
+                    
+                    # Определяем фактическое значение cookie
+                    cookie_value = get_value(
+                        name, host_key, value, encrypted_value, 
+                        decrypted_cookies, cookies_path
+                    )
+                    
+                    record = make_record((
+                        username,
+                        browser_name,
+                        host_key,
+                        name,
+                        cookie_value,
+                        path,
+                        creation_utc,
+                        creation_date,
+                        expires_utc,
+                        expires_date,
+                        last_access_utc,
+                        last_access_date,
+                        last_update_utc,
+                        last_update_date,
+                        is_secure,
+                        is_httponly,
+                        cookie_type,
+                        priority_text,
+                        samesite_text,
+                        cookies_path
+                    ))
+                    batch.append(record)
                 
-                record = (
-                    self.__parameters.get('USERNAME', 'Unknown'),
-                    browser_name,
-                    host_key or '',
-                    name or '',
-                    cookie_value,
-                    path or '',
-                    creation_utc or 0,
-                    creation_date,
-                    expires_utc or 0,
-                    expires_date,
-                    last_access_utc or 0,
-                    last_access_date,
-                    last_update_utc or 0,
-                    last_update_date,
-                    bool(is_secure),
-                    bool(is_httponly),
-                    cookie_type,
-                    priority_text,
-                    samesite_text,
-                    cookies_path
-                )
-                results.append(record)
-                
-                # ДОБАВИМ ОТЛАДОЧНЫЙ ВЫВОД
-                if len(results) % 100 == 0:
-                    print(f"[DEBUG] Обработано записей: {len(results)}")
+                records_count += len(batch)
+                yield batch
                 
         except sqlite3.Error as e:
             self.__parameters.get('LOG').Warn('ChromiumCookies', f'Ошибка парсинга cookies: {e}')
-            print(f"[DEBUG] Ошибка SQLite: {e}")
         except Exception as e:
             self.__parameters.get('LOG').Error('ChromiumCookies', f'Критическая ошибка: {e}')
-            print(f"[DEBUG] Критическая ошибка: {e}")
         finally:
-            if 'conn' in locals():
+            if conn is not None:
                 conn.close()
-            if os.path.exists(temp_path):
+            if temp_path and os.path.exists(temp_path):
                 os.remove(temp_path)
         
-        print(f"[DEBUG] Завершен парсинг, найдено записей: {len(results)}")
-        return results
+        self.__parameters.get('LOG').Debug('ChromiumCookies', f'Завершен парсинг, найдено записей: {records_count}')
+    
+    def write_cookies_file_direct(self, cookies_path: str, browser_name: str, output_writer) -> Optional[int]:
+        """
+        Переносит cookies в выходную БД одним запросом INSERT ... SELECT:
+        файл cookies подключается к выходной БД (ATTACH) только на чтение,
+        строки не проходят через Python. Даты, кроме граничных случаев,
+        вычисляет SQLite; через Python дешифруются только пустые значения.
+        
+        Возвращает число записей или None, если файл нужно разобрать обычным путем
+        """
+        db = output_writer.GetDBConnection()
+        if db is None:
+            return None
+        
+        decrypted_cookies = self.cookie_value_resolver.cookie_decryptor._get_decrypted_cookies(browser_name)
+        get_value = self.cookie_value_resolver.get_cookie_value
+        
+        def cookie_value(name, host_key, value, encrypted_value):
+            return get_value(name, host_key, value, encrypted_value, decrypted_cookies, cookies_path)
+        
+        # Файл проверяется отдельным соединением с коротким ожиданием блокировки:
+        # ATTACH к выходной БД ждал бы заблокированный браузером файл полный
+        # timeout выходного соединения в потоке цикла событий
+        try:
+            probe = connect_for_reading(cookies_path)
+            try:
+                has_cookies_table = probe.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table' AND name='cookies'"
+                ).fetchone() is not None
+            finally:
+                probe.close()
+        except sqlite3.Error as e:
+            self.__parameters.get('LOG').Debug('ChromiumCookies', f'Не удалось открыть {cookies_path}: {e}')
+            return None
+        
+        if not has_cookies_table:
+            self.__parameters.get('LOG').Debug('ChromiumCookies', "Таблица 'cookies' не найдена в базе")
+            return 0
+        
+        db.CreateFunction('chrome_time', 1, convert_chrome_time)
+        db.CreateFunction('cookie_value', 4, cookie_value)
+        
+        # ATTACH невозможен внутри открытой транзакции
+        db.Commit()
+        try:
+            db.Exec(f'ATTACH DATABASE ? AS {_SOURCE_SCHEMA};', (readonly_uri(cookies_path),))
+        except sqlite3.Error as e:
+            self.__parameters.get('LOG').Debug('ChromiumCookies', f'Не удалось подключить {cookies_path}: {e}')
+            return None
+        
+        try:
+            username = self.__parameters.get('USERNAME', 'Unknown')
+            return output_writer.WriteRecordsFromQuery(_COOKIES_TRANSFER_SQL, (username, browser_name, cookies_path))
+        except sqlite3.Error as e:
+            # Запрос выполняется атомарно - частично записанных строк не остается
+            self.__parameters.get('LOG').Debug('ChromiumCookies', f'Перенос средствами SQLite не выполнен: {e}')
+            return None
+        finally:
+            db.Commit()
+            db.Exec(f'DETACH DATABASE {_SOURCE_SCHEMA};')
 
 class CookiesProcessor:
     """Основной процессор обработки cookies"""
@@ -297,18 +435,68 @@ class CookiesProcessor:
         self.cookie_value_resolver = CookieValueResolver(self.cookie_decryptor)
         self.cookies_file_parser = CookiesFileParser(parameters, self.cookie_value_resolver)
         
-    def process_all_browsers(self) -> List[Tuple]:
-        """Обрабатывает cookies всех найденных браузеров"""
-        all_records = []
+    async def write_all_browsers(self, output_writer) -> int:
+        """
+        Записывает cookies всех найденных браузеров в выходную БД SQLite
+        запросами INSERT ... SELECT. Файлы, которые не удалось перенести так,
+        разбираются обычным путем. Возвращает число записей.
+        
+        Подключение к выходной БД привязано к потоку цикла событий, поэтому запись
+        идет в нем. Долгие операции вынесены в потоки: cookies browser-cookie3
+        загружаются заранее для всех браузеров одновременно, а разбор файла
+        обычным путем идет в отдельном потоке
+        """
+        records_count = 0
+        log = self.__parameters.get('LOG')
+        ui_redraw = self.__parameters.get('UIREDRAW')
         browser_paths = BrowserFinder.get_cookies_paths()
         
-        for i, (cookies_path, browser_name, browser_folder) in enumerate(browser_paths):
-            self.__parameters.get('LOG').Info('ChromiumCookies', f'Найден браузер: {browser_name}')
-            records = self.cookies_file_parser.parse_cookies_file(cookies_path, browser_name)
-            all_records.extend(records)
-            print(f"[DEBUG] Найдено cookies в {browser_name}: {len(records)}")
+        for cookies_path, browser_name, browser_folder in browser_paths:
+            log.Info('ChromiumCookies', f'Найден браузер: {browser_name}')
         
-        return all_records
+        if BROWSER_COOKIE3_AVAILABLE:
+            # Результат кэшируется по семейству браузера и затем берется из кэша
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(
+                loop.run_in_executor(None, self.cookie_decryptor._get_decrypted_cookies, browser_name)
+                for cookies_path, browser_name, browser_folder in browser_paths
+            ))
+        
+        for i, (cookies_path, browser_name, browser_folder) in enumerate(browser_paths):
+            if ui_redraw:
+                await ui_redraw(f'Запись {browser_name}...', 80 + (i * 15 // len(browser_paths)))
+            try:
+                count = self.cookies_file_parser.write_cookies_file_direct(cookies_path, browser_name, output_writer)
+                if count is None:
+                    count = await self._write_parsed_batches(cookies_path, browser_name, output_writer)
+            except Exception as e:
+                # Ошибка одного браузера не должна прерывать обработку остальных
+                log.Warn('ChromiumCookies', f'Ошибка записи cookies {browser_name}: {e}')
+                continue
+            log.Debug('ChromiumCookies', f'Найдено cookies в {browser_name}: {count}')
+            records_count += count
+        return records_count
+    
+    async def _write_parsed_batches(self, cookies_path: str, browser_name: str, output_writer) -> int:
+        """
+        Разбирает файл cookies обычным путем и записывает порции по мере чтения.
+        Подключение к файлу открывается внутри генератора, поэтому все порции
+        читаются в одном и том же потоке
+        """
+        count = 0
+        loop = asyncio.get_running_loop()
+        parser = self.cookies_file_parser.iter_cookies_batches(cookies_path, browser_name)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            try:
+                while True:
+                    batch = await loop.run_in_executor(executor, next, parser, None)
+                    if batch is None:
+                        break
+                    output_writer.WriteRecords(batch)
+                    count += len(batch)
+            finally:
+                await loop.run_in_executor(executor, parser.close)
+        return count
 
 
 class Parser():
@@ -323,11 +511,18 @@ class Parser():
     async def Start(self) -> Dict:
         storage = self.__parameters.get('STORAGE')
         output_writer = self.__parameters.get('OUTPUTWRITER')
+        log = self.__parameters.get('LOG')
+        ui_redraw = self.__parameters.get('UIREDRAW')
+        module_name = self.__parameters.get('MODULENAME')
         
-        print(f"[DEBUG] Start вызван, output_writer: {output_writer}")
+        log.Debug('ChromiumCookies', f'Start вызван, output_writer: {output_writer}')
+        if BROWSER_COOKIE3_AVAILABLE:
+            log.Debug('ChromiumCookies', 'browser-cookie3 доступен, будет использован для дешифровки')
+        else:
+            log.Debug('ChromiumCookies', 'browser-cookie3 не установлен, дешифровка будет ограничена')
         
         if not self.__parameters.get('DBCONNECTION').IsConnected():
-            print("[DEBUG] Нет подключения к БД")
+            log.Debug('ChromiumCookies', 'Нет подключения к БД')
             return {}
         
         # Структура полей для БД
@@ -405,63 +600,54 @@ Cookies (куки) браузеров на базе Chromium
 """
         
         # Настройка вывода
-        print("[DEBUG] Настройка полей output_writer")
+        log.Debug('ChromiumCookies', 'Настройка полей output_writer')
         output_writer.SetFields(fields_description, record_fields)
         output_writer.CreateDatabaseTables()
         
-        await self.__parameters.get('UIREDRAW')('Поиск браузеров Chromium...', 10)
-        
-        # Обработка всех браузеров
-        all_records = self.cookies_processor.process_all_browsers()
-        
-        print(f"[DEBUG] Всего найдено записей: {len(all_records)}")
+        await ui_redraw('Поиск браузеров Chromium...', 10)
         
-        # Запись результатов
-        await self.__parameters.get('UIREDRAW')('Запись результатов...', 80)
+        # Обработка всех браузеров и запись результатов по мере чтения
+        await ui_redraw('Запись результатов...', 80)
         
-        print(f"[DEBUG] Начинаем запись {len(all_records)} записей в output_writer")
         record_count = 0
-        for i, record in enumerate(all_records):
-            try:
-                output_writer.WriteRecord(record)
-                record_count += 1
-                if i % 50 == 0:
-                    print(f"[DEBUG] Записано записей: {i+1}")
-            except Exception as e:
-                print(f"[DEBUG] Ошибка при записи записи {i}: {e}")
+        try:
+            # Данные переносятся запросами внутри SQLite выходной БД
+            record_count = await self.cookies_processor.write_all_browsers(output_writer)
+        except Exception as e:
+            log.Warn('ChromiumCookies', f'Ошибка пакетной записи: {e}')
         
-        print(f"[DEBUG] Все записи отправлены в output_writer, всего записей: {record_count}")
+        log.Debug('ChromiumCookies', f'Все записи отправлены в output_writer, всего записей: {record_count}')
         
         # Завершение работы
-        await self.__parameters.get('UIREDRAW')('Формирование БД...', 95)
+        await ui_redraw('Формирование БД...', 95)
         
-        print("[DEBUG] Удаляем временные таблицы")
+        log.Debug('ChromiumCookies', 'Удаляем временные таблицы')
         output_writer.RemoveTempTables()
         
-        print("[DEBUG] Создаем индексы")
-        await output_writer.CreateDatabaseIndexes(self.__parameters.get('MODULENAME'))
+        log.Debug('ChromiumCookies', 'Создаем индексы')
+        await output_writer.CreateDatabaseIndexes(module_name)
         
         info_data = {
-            'Name': self.__parameters.get('MODULENAME'),
+            'Name': module_name,
             'Help': HELP_TEXT,
             'Timestamp': self.__parameters.get('CASENAME'),
             'Vendor': 'LabFramework',
-            'RecordsProcessed': str(len(all_records)),
+            'RecordsProcessed': str(record_count),
             'Note': 'Значения cookies дешифруются через browser-cookie3. Убедитесь, что он установлен (pip install browser-cookie3).'
         }
         
-        print("[DEBUG] Устанавливаем метаинформацию")
+        log.Debug('ChromiumCookies', 'Устанавливаем метаинформацию')
         output_writer.SetInfo(info_data)
         
-        print("[DEBUG] Записываем метаданные")
+        log.Debug('ChromiumCookies', 'Записываем метаданные')
         output_writer.WriteMeta()
         
-        print("[DEBUG] Закрываем вывод")
+        log.Debug('ChromiumCookies', 'Закрываем вывод')
         await output_writer.CloseOutput()
         
-        await self.__parameters.get('UIREDRAW')('Завершено!', 100)
+        await ui_redraw('Завершено!', 100)
         
         db_name = output_writer.GetDBName()
-        print(f"[DEBUG] Имя БД: {db_name}")
+        log.Debug('ChromiumCookies', f'Имя БД: {db_name}')
         
-        return {self.__parameters.get('MODULENAME'): db_name}
\ No newline at end of file
+        return {module_name: db_name}
\ No newline at end of file
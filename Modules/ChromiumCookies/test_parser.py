@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for Chromium cookies parser module
+"""
+import unittest
+import tempfile
+import shutil
+import os
+import sqlite3
+import time
+from unittest.mock import Mock, patch
+import asyncio
+
+# Импортируем классы из модуля (Parser.py добавляет корень проекта в sys.path)
+from Parser import (
+    CookieRow,
+    CookiesProcessor
+)
+from Common.Routines import SQLiteDatabaseInterface
+from Interfaces.OutputInterface import SQLiteDBOutputWriter
+
+
+# Строки тестового файла cookies: обычные значения, NULL, зашифрованные
+# и бинарные значения, граничные временные метки
+_COOKIES_ROWS = [
+    # creation_utc, host_key, name, value, encrypted_value, path, expires_utc,
+    # is_secure, is_httponly, last_access_utc, has_expires, is_persistent,
+    # priority, samesite, last_update_utc
+    (13318267369295313, '.example.com', 'sid', 'abc', b'', '/', 13350000000000000,
+     1, 1, 13318267369999999, 1, 1, 1, 1, 13318267369295313),
+    (13318267360000000, '.example.com', 'enc', '', b'v10' + b'\x01' * 29, '/', 0,
+     0, 0, 13318267360000001, 0, 0, 2, -1, 0),
+    (0, 'example.org', 'plain', '', b'text value', '/path', 265046774400000000,
+     1, 0, 13318267350000000, 1, 1, 0, 3, 1),
+    (None, None, None, None, None, None, None,
+     None, None, 13318267340000000, None, None, None, None, None),
+    (13318267330999999, '.example.net', 'bin', '', b'\xff\xfe\x00\x01', '/', -1,
+     0, 1, 13318267330000000, 1, 1, 5, 7, 13318267330999999),
+    # encrypted_value типа TEXT (типы столбцов SQLite не строгие)
+    (13318267320000000, '.example.net', 'text', '', 'v10 text', '/', 0,
+     0, 0, 13318267320000000, 0, 0, 0, 0, 0),
+]
+
+
+class TestCookiesTransfer(unittest.TestCase):
+    """Тесты переноса cookies в выходную БД"""
+
+    def setUp(self):
+        """Создание тестового файла cookies"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cookies_path = os.path.join(self.temp_dir, 'Cookies')
+
+        conn = sqlite3.connect(self.cookies_path)
+        conn.execute('''
+            CREATE TABLE cookies (
+                creation_utc INTEGER,
+                host_key TEXT,
+                name TEXT,
+                value TEXT,
+                encrypted_value BLOB,
+                path TEXT,
+                expires_utc INTEGER,
+                is_secure INTEGER,
+                is_httponly INTEGER,
+                last_access_utc INTEGER,
+                has_expires INTEGER,
+                is_persistent INTEGER,
+                priority INTEGER,
+                samesite INTEGER,
+                last_update_utc INTEGER
+            )
+        ''')
+        conn.executemany('INSERT INTO cookies VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)', _COOKIES_ROWS)
+        conn.commit()
+        conn.close()
+
+        self.parameters = {
+            'LOG': Mock(),
+            'TEMP': self.temp_dir,
+            'USERNAME': 'test_user',
+            'MODULENAME': 'ChromiumCookies'
+        }
+        self.processor = CookiesProcessor(self.parameters)
+        self.connections = []
+
+    def tearDown(self):
+        """Очистка временных файлов"""
+        for conn in self.connections:
+            conn.CloseConnection()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_output_writer(self, db_name: str) -> SQLiteDBOutputWriter:
+        """Создает выходную БД с полями записи cookie"""
+        log = self.parameters['LOG']
+        conn = SQLiteDatabaseInterface(os.path.join(self.temp_dir, db_name), log, 'ChromiumCookies', False)
+        self.connections.append(conn)
+
+        record_fields = {
+            field: 'INTEGER' if field.endswith('UTC') or field.startswith('Is') else 'TEXT'
+            for field in CookieRow._fields
+        }
+        fields_description = {field: (field, 100, 'string', field) for field in CookieRow._fields}
+
+        output_writer = SQLiteDBOutputWriter({'DBNAME': db_name, 'MODULENAME': 'ChromiumCookies'})
+        output_writer.SetDBConnection(conn)
+        output_writer.SetFields(fields_description, record_fields)
+        output_writer.CreateDatabaseTables()
+        return output_writer
+
+    @staticmethod
+    def _read_records(output_writer: SQLiteDBOutputWriter) -> list:
+        """Читает записанные строки без столбца ID"""
+        output_writer.GetDBConnection().Commit()
+        return [row[1:] for row in output_writer.GetDBConnection().Fetch('SELECT * FROM Data ORDER BY ID;')]
+
+    def test_direct_transfer_matches_parsed_batches(self):
+        """Перенос через ATTACH дает те же строки, что и разбор порциями"""
+        file_parser = self.processor.cookies_file_parser
+
+        direct_writer = self._create_output_writer('direct.sqlite')
+        count = file_parser.write_cookies_file_direct(self.cookies_path, 'Chromium', direct_writer)
+        self.assertEqual(count, len(_COOKIES_ROWS))
+
+        parsed_writer = self._create_output_writer('parsed.sqlite')
+        for batch in file_parser.iter_cookies_batches(self.cookies_path, 'Chromium'):
+            parsed_writer.WriteRecords(batch)
+
+        direct_records = self._read_records(direct_writer)
+        self.assertEqual(len(direct_records), len(_COOKIES_ROWS))
+        self.assertEqual(direct_records, self._read_records(parsed_writer))
+
+    def test_direct_transfer_without_cookies_table(self):
+        """Файл без таблицы cookies переносится как пустой"""
+        empty_path = os.path.join(self.temp_dir, 'Empty')
+        sqlite3.connect(empty_path).close()
+
+        output_writer = self._create_output_writer('empty.sqlite')
+        count = self.processor.cookies_file_parser.write_cookies_file_direct(empty_path, 'Chromium', output_writer)
+        self.assertEqual(count, 0)
+        self.assertEqual(self._read_records(output_writer), [])
+
+    def test_direct_transfer_locked_file(self):
+        """Заблокированный браузером файл не ждет timeout выходной БД и уходит в обычный разбор"""
+        lock = sqlite3.connect(self.cookies_path, isolation_level=None)
+        lock.execute('BEGIN EXCLUSIVE')
+        try:
+            output_writer = self._create_output_writer('locked.sqlite')
+            started = time.monotonic()
+            count = self.processor.cookies_file_parser.write_cookies_file_direct(self.cookies_path, 'Chromium', output_writer)
+            elapsed = time.monotonic() - started
+        finally:
+            lock.execute('ROLLBACK')
+            lock.close()
+        
+        self.assertIsNone(count)
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(self._read_records(output_writer), [])
+
+    def test_direct_transfer_not_a_database(self):
+        """Поврежденный файл уходит в обычный разбор, а не считается пустым"""
+        broken_path = os.path.join(self.temp_dir, 'Broken')
+        with open(broken_path, 'wb') as f:
+            f.write(b'not a sqlite database' * 100)
+
+        output_writer = self._create_output_writer('broken.sqlite')
+        count = self.processor.cookies_file_parser.write_cookies_file_direct(broken_path, 'Chromium', output_writer)
+        self.assertIsNone(count)
+
+    @patch('Parser.BrowserFinder')
+    def test_write_all_browsers_continues_after_error(self, mock_browser_finder):
+        """Ошибка одного браузера не прерывает запись остальных"""
+        mock_browser_finder.get_cookies_paths.return_value = [
+            (self.cookies_path, 'Broken', 'broken'),
+            (self.cookies_path, 'Chromium', 'chromium')
+        ]
+        file_parser = self.processor.cookies_file_parser
+        write_direct = file_parser.write_cookies_file_direct
+
+        def failing_write(cookies_path, browser_name, output_writer):
+            if browser_name == 'Broken':
+                raise RuntimeError('test error')
+            return write_direct(cookies_path, browser_name, output_writer)
+
+        output_writer = self._create_output_writer('partial.sqlite')
+        with patch.object(file_parser, 'write_cookies_file_direct', side_effect=failing_write):
+            loop = asyncio.new_event_loop()
+            try:
+                count = loop.run_until_complete(self.processor.write_all_browsers(output_writer))
+            finally:
+                loop.close()
+
+        self.assertEqual(count, len(_COOKIES_ROWS))
+        self.assertEqual(len(self._read_records(output_writer)), len(_COOKIES_ROWS))
+        self.parameters['LOG'].Warn.assert_called()
+
+    @patch('Parser.BrowserFinder')
+    def test_write_all_browsers_fallback(self, mock_browser_finder):
+        """Если перенос через ATTACH не удался, файл разбирается обычным путем"""
+        mock_browser_finder.get_cookies_paths.return_value = [
+            (self.cookies_path, 'Chromium', 'chromium')
+        ]
+
+        direct_writer = self._create_output_writer('direct.sqlite')
+        self.processor.cookies_file_parser.write_cookies_file_direct(self.cookies_path, 'Chromium', direct_writer)
+
+        fallback_writer = self._create_output_writer('fallback.sqlite')
+        with patch.object(self.processor.cookies_file_parser, 'write_cookies_file_direct', return_value=None):
+            loop = asyncio.new_event_loop()
+            try:
+                count = loop.run_until_complete(self.processor.write_all_browsers(fallback_writer))
+            finally:
+                loop.close()
+
+        self.assertEqual(count, len(_COOKIES_ROWS))
+        self.assertEqual(self._read_records(fallback_writer), self._read_records(direct_writer))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
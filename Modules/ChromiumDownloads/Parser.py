@@ -2,11 +2,56 @@
 """
 Модуль обработки истории загрузок браузера Chromium
 """
-import os, sqlite3, shutil
-from typing import Dict, List, Tuple
+import os, sqlite3, asyncio
+from typing import AsyncIterator, Dict, List, Tuple
 from datetime import datetime
-from Common.time_utils import convert_chrome_time
+from Common.time_utils import convert_chrome_time, chrome_time_sql
 from Common.browser_finder import BrowserFinder
+from Common.sqlite_utils import connect_readonly
+
+# Статусы загрузки
+_STATE_MAP = {
+    0: "В процессе",
+    1: "Завершена",
+    2: "Отменена",
+    3: "Прервана"
+}
+
+# Уровни опасности загруженного файла
+_DANGER_MAP = {
+    0: "Безопасный",
+    1: "Опасный",
+    2: "Подозрительный", 
+    3: "Не проверен",
+    4: "Разрешен пользователем"
+}
+
+# Выборка загрузок: NULL заменяются значениями по умолчанию, числовые столбцы
+# приводятся к целым (типы столбцов SQLite не строгие), даты начала и завершения
+# формируются в SQLite, нестандартные метки - через функцию chrome_time
+_DOWNLOADS_SELECT_SQL = f"""
+    SELECT 
+        CAST(IFNULL(id, 0) AS INTEGER),
+        IFNULL(target_path, ''),
+        IFNULL(tab_url, ''),
+        IFNULL(tab_referrer_url, ''),
+        CAST(IFNULL(start_time, 0) AS INTEGER),
+        CAST(IFNULL(end_time, 0) AS INTEGER),
+        CAST(IFNULL(received_bytes, 0) AS INTEGER),
+        CAST(IFNULL(total_bytes, 0) AS INTEGER),
+        CAST(IFNULL(state, 0) AS INTEGER),
+        CAST(IFNULL(danger_type, 0) AS INTEGER),
+        CAST(IFNULL(interrupt_reason, 0) AS INTEGER),
+        CAST(IFNULL(opened, 0) AS INTEGER),
+        CAST(IFNULL(last_access_time, 0) AS INTEGER),
+        {chrome_time_sql('CAST(IFNULL(start_time, 0) AS INTEGER)', 'chrome_time')},
+        {chrome_time_sql('CAST(IFNULL(end_time, 0) AS INTEGER)', 'chrome_time')}
+    FROM downloads 
+    ORDER BY start_time DESC
+    """
+
+# Единицы размера файла, по 1024 в каждой следующей
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 class FileSizeFormatter:
     """Класс для форматирования размеров файлов"""
@@ -16,12 +61,12 @@ class FileSizeFormatter:
         """Форматирует размер файла в читаемый вид"""
         if not bytes_size:
             return "0 B"
-            
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if bytes_size < 1024.0:
-                return f"{bytes_size:.1f} {unit}"
-            bytes_size /= 1024.0
-        return f"{bytes_size:.1f} TB"
+        if bytes_size < 1024:
+            return f"{bytes_size:.1f} B"
+        
+        # Номер единицы определяется по разрядности числа, без цикла делений
+        i = min((bytes_size.bit_length() - 1) // 10, 4)
+        return f"{bytes_size / (1 << (i * 10)):.1f} {_SIZE_UNITS[i]}"
 
 
 class DownloadsParser:
@@ -35,17 +80,13 @@ class DownloadsParser:
         """Парсинг истории загрузок браузера"""
         results = []
         
-        if not os.path.exists(history_path):
-            return results
-            
-        # Создаем временную копию для избежания блокировки
-        temp_dir = self.__parameters.get('TEMP')
-        temp_path = os.path.join(temp_dir, f'temp_downloads_{os.path.basename(history_path)}')
+        # Существование файла уже проверено BrowserFinder (единственный stat на путь)
+        # Открываем оригинал только на чтение; копия создается лишь при ошибке открытия
+        conn = None
+        temp_path = None
         
         try:
-            shutil.copy2(history_path, temp_path)
-            
-            conn = sqlite3.connect(temp_path)
+            conn, temp_path = connect_readonly(history_path, self.__parameters.get('TEMP'), 'temp_downloads_')
             cursor = conn.cursor()
             
             # Проверяем существование таблицы downloads
@@ -53,74 +94,29 @@ class DownloadsParser:
             if not cursor.fetchone():
                 return results
             
-            # Получаем историю загрузок
-            query = """
-            SELECT 
-                id,
-                target_path,
-                tab_url,
-                tab_referrer_url,
-                start_time,
-                end_time,
-                received_bytes,
-                total_bytes,
-                state,
-                danger_type,
-                interrupt_reason,
-                opened,
-                last_access_time
-            FROM downloads 
-            ORDER BY start_time DESC
-            """
+            # Получаем историю загрузок; замена NULL и даты вычисляются на стороне SQLite
+            # (см. chrome_time_sql)
+            conn.create_function('chrome_time', 1, convert_chrome_time)
+            cursor.execute(_DOWNLOADS_SELECT_SQL)
+            results_append = results.append
+            format_size = self._size_formatter._format_file_size
+            username = self.__parameters.get('USERNAME', 'Unknown')
             
-            cursor.execute(query)
-            
-            for row in cursor.fetchall():
-                if len(row) < 13:  # Если данных меньше ожидаемых
-                    continue  # Пропускаем эту строку
-        
-                # Извлекаем значения с преобразованием типов
-                download_id = int(row[0]) if row[0] is not None else 0
-                target_path = str(row[1]) if row[1] is not None else ''
-                tab_url = str(row[2]) if row[2] is not None else ''
-                tab_referrer_url = str(row[3]) if row[3] is not None else ''
-                start_time = int(row[4]) if row[4] is not None else 0
-                end_time = int(row[5]) if row[5] is not None else 0
-                received_bytes = int(row[6]) if row[6] is not None else 0
-                total_bytes = int(row[7]) if row[7] is not None else 0
-                state = int(row[8]) if row[8] is not None else 0
-                danger_type = int(row[9]) if row[9] is not None else 0
-                interrupt_reason = int(row[10]) if row[10] is not None else 0
-                opened = int(row[11]) if row[11] is not None else 0
-                last_access_time = int(row[12]) if row[12] is not None else 0
-                
-                # Конвертируем временные метки
-                start_date = convert_chrome_time(start_time)
-                end_date = convert_chrome_time(end_time)
-                last_access_date = convert_chrome_time(last_access_time)
-                
-                # Определяем статус загрузки
-                state_map = {
-                    0: "В процессе",
-                    1: "Завершена",
-                    2: "Отменена",
-                    3: "Прервана"
-                }
-                status = state_map.get(state, "Неизвестно")
+            # Строки читаются курсором по мере обработки, без материализации всей таблицы
+            for row in cursor:
+                # Состав столбцов фиксирован запросом выше, NULL уже заменены в SQLite,
+                # поэтому значения используются без дополнительных проверок и приведений
+                (download_id, target_path, tab_url, tab_referrer_url, start_time, end_time,
+                 received_bytes, total_bytes, state, danger_type, interrupt_reason,
+                 opened, last_access_time, start_date, end_date) = row
                 
-                # Определяем уровень опасности
-                danger_map = {
-                    0: "Безопасный",
-                    1: "Опасный",
-                    2: "Подозрительный", 
-                    3: "Не проверен",
-                    4: "Разрешен пользователем"
-                }
-                danger_level = danger_map.get(danger_type, "Неизвестно")
+                # Определяем статус загрузки и уровень опасности
+                status = _STATE_MAP.get(state, "Неизвестно")
+                danger_level = _DANGER_MAP.get(danger_type, "Неизвестно")
                 
                 # Форматируем размеры файлов
-                received_size = self._size_formatter._format_file_size(received_bytes)
-                total_size = self._size_formatter._format_file_size(total_bytes)
+                received_size = format_size(received_bytes)
+                total_size = format_size(total_bytes)
                 
                 # Вычисляем прогресс загрузки
                 progress = 0
@@ -128,62 +124,80 @@ class DownloadsParser:
                     progress = min(100, int((received_bytes / total_bytes) * 100))
                 
                 record = (
-                    self.__parameters.get('USERNAME', 'Unknown'),
+                    username,
                     browser_name,
-                    download_id or 0,
-                    target_path or '',
-                    tab_url or '',
-                    tab_referrer_url or '',
-                    start_time or 0,
+                    download_id,
+                    target_path,
+                    tab_url,
+                    tab_referrer_url,
+                    start_time,
                     start_date,
-                    end_time or 0,
+                    end_time,
                     end_date,
-                    received_bytes or 0,
+                    received_bytes,
                     received_size,
-                    total_bytes or 0,
+                    total_bytes,
                     total_size,
                     progress,
                     status,
                     danger_level,
-                    bool(opened),
+                    1 if opened else 0,
                     history_path
                 )
-                results.append(record)
+                results_append(record)
                 
         except sqlite3.Error as e:
             self.__parameters.get('LOG').Warn('ChromiumDownloads', f'Ошибка парсинга загрузок: {e}')
         except Exception as e:
             self.__parameters.get('LOG').Error('ChromiumDownloads', f'Критическая ошибка: {e}')
         finally:
-            if 'conn' in locals():
+            if conn is not None:
                 conn.close()
-            if os.path.exists(temp_path):
+            if temp_path and os.path.exists(temp_path):
                 os.remove(temp_path)
                 
         return results
 
-    async def find_and_parse_browsers(self) -> List[Tuple]:
-        """Поиск браузеров и сбор данных"""
-        all_records = []
-        
+    async def iter_browsers_records(self) -> AsyncIterator[List[Tuple]]:
+        """
+        Поиск браузеров и сбор данных: записи выдаются отдельно по каждому браузеру
+        в порядке BrowserFinder. Файлы разбираются одновременно в потоках
+        """
         # ИСПОЛЬЗУЕМ ОБЩИЙ BrowserFinder
         browser_paths = BrowserFinder.get_history_paths()
+        log = self.__parameters.get('LOG')
         
-        for i, (history_path, browser_name, browser_folder) in enumerate(browser_paths):
-            progress = 10 + (i * 70 // max(len(browser_paths), 1))
-            
-            # Обновляем UI прогресса
-            ui_redraw = self.__parameters.get('UIREDRAW')
-            if ui_redraw:
-                import asyncio
-                asyncio.create_task(ui_redraw(f'Проверка {browser_name}...', progress))
-            
-            self.__parameters.get('LOG').Info('ChromiumDownloads', f'Найден браузер: {browser_name}')
-            records = self._parse_chrome_downloads(history_path, browser_name)
-            all_records.extend(records)
-            print(f"Найдено загрузок в {browser_name}: {len(records)}")
+        loop = asyncio.get_running_loop()
+        tasks = []
+        for history_path, browser_name, browser_folder in browser_paths:
+            log.Info('ChromiumDownloads', f'Найден браузер: {browser_name}')
+            tasks.append(loop.run_in_executor(None, self._parse_chrome_downloads, history_path, browser_name))
         
+        ui_redraw = self.__parameters.get('UIREDRAW')
+        try:
+            for i, ((history_path, browser_name, browser_folder), task) in enumerate(zip(browser_paths, tasks)):
+                progress = 10 + (i * 70 // max(len(browser_paths), 1))
+                
+                # Обновляем UI прогресса
+                if ui_redraw:
+                    await ui_redraw(f'Проверка {browser_name}...', progress)
+                
+                records = await task
+                log.Debug('ChromiumDownloads', f'Найдено загрузок в {browser_name}: {len(records)}')
+                yield records
+        finally:
+            # Если чтение прервано, оставшиеся результаты не нужны
+            for task in tasks:
+                task.cancel()
+    
+    async def find_and_parse_browsers(self) -> List[Tuple]:
+        """Поиск браузеров и сбор данных"""
+        all_records = []
+        async for records in self.iter_browsers_records():
+            all_records.extend(records)
         return all_records
+
+
 class OutputConfigurator:
     """Класс для настройки вывода данных"""
     
@@ -255,6 +269,8 @@ class Parser:
     async def Start(self) -> Dict:
         storage = self.__parameters.get('STORAGE')
         output_writer = self.__parameters.get('OUTPUTWRITER')
+        ui_redraw = self.__parameters.get('UIREDRAW')
+        module_name = self.__parameters.get('MODULENAME')
         
         if not self.__parameters.get('DBCONNECTION').IsConnected():
             return {}
@@ -279,35 +295,35 @@ Chromium Downloads Parser:
         # Настройка вывода
         self._output_configurator._configure_output(output_writer)
         
-        await self.__parameters.get('UIREDRAW')('Поиск браузеров Chromium...', 10)
-        
-        # Поиск браузеров и сбор данных
-        all_records = await self._downloads_parser.find_and_parse_browsers()
+        await ui_redraw('Поиск браузеров Chromium...', 10)
         
-        # Запись результатов
-        await self.__parameters.get('UIREDRAW')('Запись результатов...', 80)
+        # Поиск браузеров, сбор данных и запись результатов по каждому браузеру:
+        # в памяти находятся записи только одного файла; прогресс 10-80 обновляется по браузерам
+        record_count = 0
+        async for records in self._downloads_parser.iter_browsers_records():
+            output_writer.WriteRecords(records)
+            record_count += len(records)
         
-        for record in all_records:
-            output_writer.WriteRecord(record)
+        await ui_redraw('Запись результатов...', 80)
         
         # Завершение работы
-        await self.__parameters.get('UIREDRAW')('Формирование БД...', 95)
+        await ui_redraw('Формирование БД...', 95)
         
         output_writer.RemoveTempTables()
-        await output_writer.CreateDatabaseIndexes(self.__parameters.get('MODULENAME'))
+        await output_writer.CreateDatabaseIndexes(module_name)
         
         info_data = {
-            'Name': self.__parameters.get('MODULENAME'),
+            'Name': module_name,
             'Help': HELP_TEXT,
             'Timestamp': self.__parameters.get('CASENAME'),
             'Vendor': 'LabFramework',
-            'RecordsProcessed': str(len(all_records))
+            'RecordsProcessed': str(record_count)
         }
         
         output_writer.SetInfo(info_data)
         output_writer.WriteMeta()
         await output_writer.CloseOutput()
         
-        await self.__parameters.get('UIREDRAW')('Завершено!', 100)
+        await ui_redraw('Завершено!', 100)
         
-        return {self.__parameters.get('MODULENAME'): output_writer.GetDBName()}
\ No newline at end of file
+        return {module_name: output_writer.GetDBName()}
\ No newline at end of file
@@ -2,22 +2,46 @@
 """
 Модуль обработки расширений браузера Chromium
 """
-import os, json
+import os, json, asyncio
 from typing import Dict, List, Tuple
 from datetime import datetime
+from Common.browser_finder import BrowserFinder
+
+# Пробуем импортировать orjson (быстрый разбор JSON)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Размер порции при записи в БД; если порция не записалась, ее записи пишутся по одной
+_WRITE_BATCH_SIZE = 1000
+
+
+def _load_json_file(path: str):
+    """Читает JSON-файл (manifest.json, messages.json): через orjson, если он доступен"""
+    if ORJSON_AVAILABLE:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 
 class ManifestParser:
     """Класс для парсинга manifest.json файлов расширений"""
     
-    @staticmethod
-    def _parse_extension_manifest(manifest_path: str) -> dict:
+    def __init__(self, parameters: dict):
+        self.__parameters = parameters
+    
+    def _parse_extension_manifest(self, manifest_path: str) -> dict:
         """Парсит manifest.json расширения"""
         try:
-            with open(manifest_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _load_json_file(manifest_path)
+        except (FileNotFoundError, NotADirectoryError):
+            # В папке версии нет manifest.json - это не расширение
+            return {}
         except Exception as e:
-            print(f"Ошибка чтения manifest.json {manifest_path}: {e}")
+            self.__parameters.get('LOG').Warn('ChromiumExtensions', f'Ошибка чтения manifest.json {manifest_path}: {e}')
             return {}
 
 
@@ -46,15 +70,15 @@ class ExtensionLocalizationHandler:
             # Локализованное название - берем из default_locale
             default_locale = manifest.get('default_locale', 'en')
             locales_path = os.path.join(version_path, '_locales', default_locale, 'messages.json')
-            if os.path.exists(locales_path):
-                try:
-                    with open(locales_path, 'r', encoding='utf-8') as f:
-                        locales = json.load(f)
-                        name_key = name.replace('__MSG_', '').replace('__', '')
-                        if name_key in locales:
-                            name = locales[name_key].get('message', name)
-                except:
-                    pass
+            # Файл каждой версии читается один раз за проход; отсутствие файла
+            # выясняется при открытии, без отдельной проверки
+            try:
+                locales = _load_json_file(locales_path)
+                name_key = name.replace('__MSG_', '').replace('__', '')
+                if name_key in locales:
+                    name = locales[name_key].get('message', name)
+            except:
+                pass
         return name
 
 
@@ -75,7 +99,7 @@ class ExtensionsParser:
     
     def __init__(self, parameters: dict):
         self.__parameters = parameters
-        self._manifest_parser = ManifestParser()
+        self._manifest_parser = ManifestParser(parameters)
         self._string_converter = StringConverter()
         self._localization_handler = ExtensionLocalizationHandler()
         self._permissions_formatter = PermissionsFormatter()
@@ -83,57 +107,57 @@ class ExtensionsParser:
     def _parse_chrome_extensions(self, extensions_path: str, browser_name: str) -> List[Tuple]:
         """Парсинг расширений браузера"""
         results = []
+        log = self.__parameters.get('LOG')
+        username = self.__parameters.get('USERNAME', 'Unknown')
         
-        if not os.path.exists(extensions_path):
-            print(f"Папка расширений не найдена: {extensions_path}")
-            return results
-            
         try:
-            print(f"Сканируем папку расширений: {extensions_path}")
+            log.Debug('ChromiumExtensions', f'Сканируем папку расширений: {extensions_path}')
             
-            # Ищем все папки расширений
-            for ext_id in os.listdir(extensions_path):
-                ext_path = os.path.join(extensions_path, ext_id)
-                if os.path.isdir(ext_path):
-                    print(f"Найдено расширение ID: {ext_id}")
+            # Ищем все папки расширений; тип записи берется из чтения каталога, без stat
+            with os.scandir(extensions_path) as ext_entries:
+                for ext_entry in ext_entries:
+                    if not ext_entry.is_dir():
+                        continue
+                    ext_id = ext_entry.name
                     
                     # Ищем версии внутри расширения
-                    for version in os.listdir(ext_path):
-                        version_path = os.path.join(ext_path, version)
-                        manifest_path = os.path.join(version_path, 'manifest.json')
-                        
-                        if os.path.exists(manifest_path):
-                            print(f"  Версия: {version}, manifest: {manifest_path}")
+                    with os.scandir(ext_entry.path) as version_entries:
+                        for version_entry in version_entries:
+                            version = version_entry.name
+                            version_path = version_entry.path
+                            manifest_path = os.path.join(version_path, 'manifest.json')
+                            
+                            # Отсутствие manifest.json выясняется при открытии, без отдельной проверки
                             manifest = self._manifest_parser._parse_extension_manifest(manifest_path)
+                            if not manifest:
+                                continue
                             
-                            if manifest:
-                                # Получаем название (может быть в разных полях)
-                                name = self._localization_handler._get_localized_name(manifest, version_path)
-                                
-                                # Безопасно конвертируем все значения в строки
-                                permissions = manifest.get('permissions', [])
-                                permissions_str = self._permissions_formatter._format_permissions(permissions)
-                                
-                                # Формируем запись (все поля как строки)
-                                record = (
-                                    self.__parameters.get('USERNAME', 'Unknown'),
-                                    browser_name,
-                                    ext_id,
-                                    version,
-                                    self._string_converter._safe_string(name),
-                                    self._string_converter._safe_string(manifest.get('version', '')),
-                                    self._string_converter._safe_string(manifest.get('description', '')),
-                                    self._string_converter._safe_string(manifest.get('author', '')),
-                                    permissions_str,
-                                    manifest_path
-                                )
-                                results.append(record)
-                                print(f"    Добавлено: {name} v{manifest.get('version', '')}")
+                            # Получаем название (может быть в разных полях)
+                            name = self._localization_handler._get_localized_name(manifest, version_path)
+                            
+                            # Безопасно конвертируем все значения в строки
+                            permissions = manifest.get('permissions', [])
+                            permissions_str = self._permissions_formatter._format_permissions(permissions)
+                            
+                            # Формируем запись (все поля как строки)
+                            record = (
+                                username,
+                                browser_name,
+                                ext_id,
+                                version,
+                                self._string_converter._safe_string(name),
+                                self._string_converter._safe_string(manifest.get('version', '')),
+                                self._string_converter._safe_string(manifest.get('description', '')),
+                                self._string_converter._safe_string(manifest.get('author', '')),
+                                permissions_str,
+                                manifest_path
+                            )
+                            results.append(record)
             
+        except FileNotFoundError:
+            log.Debug('ChromiumExtensions', f'Папка расширений не найдена: {extensions_path}')
         except Exception as e:
-            print(f"Ошибка парсинга расширений: {e}")
-            import traceback
-            traceback.print_exc()
+            log.Error('ChromiumExtensions', f'Ошибка парсинга расширений: {e}')
                 
         return results
 
@@ -185,37 +209,32 @@ class ExtensionsBrowserFinder:
         self.__parameters = parameters
     
     async def _find_browsers_extensions(self, extensions_parser: ExtensionsParser) -> List[Tuple]:
-        """Поиск браузеров и сбор данных расширений"""
-        print("=== EXTENSIONS PARSER ЗАПУЩЕН ===")
+        """
+        Поиск браузеров и сбор данных расширений.
+        Папки браузеров независимы, поэтому сканируются одновременно в потоках;
+        записи собираются в порядке BrowserFinder
+        """
+        # Поиск браузеров: одно чтение ~/.config и stat только для найденных папок
+        browser_paths = BrowserFinder.get_extensions_paths()
+        log = self.__parameters.get('LOG')
         
-        # Поиск браузеров
-        browsers = [
-            ('google-chrome', 'Google Chrome'),
-            ('chromium', 'Chromium'),
-            ('microsoft-edge', 'Microsoft Edge'),
-            ('opera', 'Opera'),
-            ('brave', 'Brave')
-        ]
+        for extensions_path, browser_name, browser_folder in browser_paths:
+            log.Info('ChromiumExtensions', f'Найден браузер: {browser_name}')
         
-        all_records = []
+        loop = asyncio.get_running_loop()
+        records_lists = await asyncio.gather(*(
+            loop.run_in_executor(None, extensions_parser._parse_chrome_extensions, extensions_path, browser_name)
+            for extensions_path, browser_name, browser_folder in browser_paths
+        ))
         
-        for i, (browser_folder, browser_name) in enumerate(browsers):
-            progress = 10 + (i * 70 // len(browsers))
-            await self.__parameters.get('UIREDRAW')(f'Проверка {browser_name}...', progress)
-            
-            extensions_path = os.path.join(
-                os.path.expanduser('~'),
-                '.config', 
-                browser_folder,
-                'Default',
-                'Extensions'
-            )
+        all_records = []
+        ui_redraw = self.__parameters.get('UIREDRAW')
+        for i, ((extensions_path, browser_name, browser_folder), records) in enumerate(zip(browser_paths, records_lists)):
+            progress = 10 + (i * 70 // len(browser_paths))
+            await ui_redraw(f'Проверка {browser_name}...', progress)
             
-            if os.path.exists(extensions_path):
-                self.__parameters.get('LOG').Info('ChromiumExtensions', f'Найден браузер: {browser_name}')
-                records = extensions_parser._parse_chrome_extensions(extensions_path, browser_name)
-                all_records.extend(records)
-                print(f"Найдено расширений в {browser_name}: {len(records)}")
+            all_records.extend(records)
+            log.Debug('ChromiumExtensions', f'Найдено расширений в {browser_name}: {len(records)}')
         
         return all_records
 
@@ -229,8 +248,38 @@ class Parser:
         self._output_configurator = ExtensionsOutputConfigurator(parameters)
         self._browser_finder = ExtensionsBrowserFinder(parameters)
     
+    def _write_records(self, output_writer, records: List[Tuple]) -> None:
+        """
+        Пакетная запись (executemany) порциями по _WRITE_BATCH_SIZE. Порция пишется
+        внутри точки сохранения: при ошибке ее частично вставленные строки отменяются,
+        и записи порции пишутся по одной, пропуская только ошибочные
+        """
+        log = self.__parameters.get('LOG')
+        db = output_writer.GetDBConnection()
+        
+        for start in range(0, len(records), _WRITE_BATCH_SIZE):
+            batch = records[start:start + _WRITE_BATCH_SIZE]
+            db.Exec('SAVEPOINT extensions_batch;')
+            try:
+                output_writer.WriteRecords(batch, autoCommit=False)
+                db.Exec('RELEASE extensions_batch;')
+            except Exception as e:
+                db.Exec('ROLLBACK TO extensions_batch;')
+                db.Exec('RELEASE extensions_batch;')
+                log.Warn('ChromiumExtensions',
+                    f'Ошибка записи записей {start + 1}-{start + len(batch)}: {e}; записи пишутся по одной')
+                for record in batch:
+                    try:
+                        output_writer.WriteRecord(record)
+                    except Exception as e:
+                        log.Error('ChromiumExtensions', f'Ошибка записи в БД: {e}; запись: {record}')
+        
+        output_writer.CommitRecords()
+    
     async def Start(self) -> Dict:
         output_writer = self.__parameters.get('OUTPUTWRITER')
+        ui_redraw = self.__parameters.get('UIREDRAW')
+        module_name = self.__parameters.get('MODULENAME')
         
         if not self.__parameters.get('DBCONNECTION').IsConnected():
             return {}
@@ -253,29 +302,24 @@ Chromium Extensions Parser:
         # Настройка вывода
         self._output_configurator._configure_output(output_writer)
         
-        await self.__parameters.get('UIREDRAW')('Поиск браузеров Chromium...', 10)
+        await ui_redraw('Поиск браузеров Chromium...', 10)
         
         # Поиск браузеров и сбор данных расширений
         all_records = await self._browser_finder._find_browsers_extensions(self._extensions_parser)
         
         # Запись результатов
-        await self.__parameters.get('UIREDRAW')('Запись результатов...', 80)
+        await ui_redraw('Запись результатов...', 80)
         
-        for record in all_records:
-            try:
-                output_writer.WriteRecord(record)
-            except Exception as e:
-                print(f"Ошибка записи записи в БД: {e}")
-                print(f"Проблемная запись: {record}")
+        self._write_records(output_writer, all_records)
         
         # Завершение работы
-        await self.__parameters.get('UIREDRAW')('Формирование БД...', 95)
+        await ui_redraw('Формирование БД...', 95)
         
         output_writer.RemoveTempTables()
-        await output_writer.CreateDatabaseIndexes(self.__parameters.get('MODULENAME'))
+        await output_writer.CreateDatabaseIndexes(module_name)
         
         info_data = {
-            'Name': self.__parameters.get('MODULENAME'),
+            'Name': module_name,
             'Help': HELP_TEXT,
             'Timestamp': self.__parameters.get('CASENAME'),
             'Vendor': 'LabFramework',
@@ -286,6 +330,6 @@ Chromium Extensions Parser:
         output_writer.WriteMeta()
         await output_writer.CloseOutput()
         
-        await self.__parameters.get('UIREDRAW')('Завершено!', 100)
+        await ui_redraw('Завершено!', 100)
         
-        return {self.__parameters.get('MODULENAME'): output_writer.GetDBName()}
\ No newline at end of file
+        return {module_name: output_writer.GetDBName()}
\ No newline at end of file
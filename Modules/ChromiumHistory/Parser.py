@@ -1,11 +1,32 @@
 """
 Модуль обработки истории браузера Chromium
 """
-import os, sqlite3, shutil
+import os, sqlite3, asyncio
 from typing import Dict, List, Tuple
 from datetime import datetime
-from Common.time_utils import convert_chrome_time
+from Common.time_utils import convert_chrome_time, chrome_time_sql
 from Common.browser_finder import BrowserFinder
+from Common.sqlite_utils import connect_readonly
+
+# Выборка истории: NULL заменяются значениями по умолчанию, дата посещения
+# формируется в SQLite, нестандартные метки - через функцию chrome_time
+_HISTORY_SELECT_SQL = f"""
+    SELECT 
+        IFNULL(url, ''), 
+        IFNULL(title, ''), 
+        IFNULL(visit_count, 0), 
+        IFNULL(typed_count, 0), 
+        IFNULL(last_visit_time, 0),
+        {chrome_time_sql('IFNULL(last_visit_time, 0)', 'chrome_time')}
+    FROM urls 
+    ORDER BY last_visit_time DESC
+    """
+
+
+def _convert_visit_time(last_visit_time) -> str:
+    """Конвертация метки, которую не смог обработать SQLite (приводится к int, как и раньше)"""
+    return convert_chrome_time(int(last_visit_time))
+
 
 class HistoryFileParser:
     """Парсер файлов истории SQLite"""
@@ -20,14 +41,12 @@ class HistoryFileParser:
         if not os.path.exists(history_path):
             return results
             
-        # Создаем временную копию для избежания блокировки
-        temp_dir = self.__parameters.get('TEMP')
-        temp_path = os.path.join(temp_dir, f'temp_history_{os.path.basename(history_path)}')
+        # Открываем оригинал только на чтение; копия создается лишь при ошибке открытия
+        conn = None
+        temp_path = None
         
         try:
-            shutil.copy2(history_path, temp_path)
-            
-            conn = sqlite3.connect(temp_path)
+            conn, temp_path = connect_readonly(history_path, self.__parameters.get('TEMP'), 'temp_history_')
             cursor = conn.cursor()
             
             # Проверяем существование таблицы urls
@@ -35,55 +54,36 @@ class HistoryFileParser:
             if not cursor.fetchone():
                 return results
             
-            # Получаем историю посещений
-            query = """
-            SELECT 
-                url, 
-                title, 
-                visit_count, 
-                typed_count, 
-                last_visit_time
-            FROM urls 
-            ORDER BY last_visit_time DESC
-            """
+            # Получаем историю посещений; замена NULL и дата посещения
+            # вычисляются на стороне SQLite (см. chrome_time_sql)
+            conn.create_function('chrome_time', 1, _convert_visit_time)
+            cursor.execute(_HISTORY_SELECT_SQL)
             
-            cursor.execute(query)
+            username = self.__parameters.get('USERNAME', 'Unknown')
             
-            for row in cursor.fetchall():
-                if len(row) < 5:  # Проверяем, что в строке достаточно данных
-                    continue  # Пропускаем строку с недостающими данными
-    
-                # Извлекаем значения с преобразованием типов
-                url = str(row[0]) if row[0] is not None else ''
-                title = str(row[1]) if row[1] is not None else ''
-                visit_count = int(row[2]) if row[2] is not None else 0
-                typed_count = int(row[3]) if row[3] is not None else 0
-                last_visit_time = int(row[4]) if row[4] is not None else 0
-                
-                # Конвертируем время
-                visit_date = convert_chrome_time(last_visit_time)
-
-                record = (
-                    self.__parameters.get('USERNAME', 'Unknown'),
+            # Строки читаются курсором по мере обработки, без материализации всей таблицы;
+            # при ошибке чтения уже прочитанные записи файла сохраняются
+            for url, title, visit_count, typed_count, last_visit_time, visit_date in cursor:
+                results.append((
+                    username,
                     browser_name,
-                    url or '',
-                    title or '',
-                    visit_count or 0,
-                    typed_count or 0,
-                    last_visit_time or 0,
+                    url,
+                    title,
+                    visit_count,
+                    typed_count,
+                    last_visit_time,
                     visit_date,
                     history_path
-                )
-                results.append(record)
+                ))
                 
         except sqlite3.Error as e:
             self.__parameters.get('LOG').Warn('ChromiumHistory', f'Ошибка парсинга: {e}')
         except Exception as e:
             self.__parameters.get('LOG').Error('ChromiumHistory', f'Критическая ошибка: {e}')
         finally:
-            if 'conn' in locals():
+            if conn is not None:
                 conn.close()
-            if os.path.exists(temp_path):
+            if temp_path and os.path.exists(temp_path):
                 os.remove(temp_path)
                 
         return results
@@ -95,24 +95,35 @@ class HistoryProcessor:
         self.__parameters = parameters
         self.history_parser = HistoryFileParser(parameters)
         
-    def process_all_browsers(self) -> List[Tuple]:
-        """Обрабатывает историю всех найденных браузеров"""
+    async def process_all_browsers(self) -> List[Tuple]:
+        """
+        Обрабатывает историю всех найденных браузеров.
+        Файлы независимы, поэтому читаются одновременно в потоках;
+        записи собираются в порядке BrowserFinder
+        """
         all_records = []
         browser_paths = BrowserFinder.get_history_paths()
+        log = self.__parameters.get('LOG')
+        
+        for history_path, browser_name, browser_folder in browser_paths:
+            log.Info('ChromiumHistory', f'Найден браузер: {browser_name}')
         
-        for i, (history_path, browser_name, browser_folder) in enumerate(browser_paths):
+        loop = asyncio.get_running_loop()
+        records_lists = await asyncio.gather(*(
+            loop.run_in_executor(None, self.history_parser.parse_history_file, history_path, browser_name)
+            for history_path, browser_name, browser_folder in browser_paths
+        ))
+        
+        ui_redraw = self.__parameters.get('UIREDRAW')
+        for i, ((history_path, browser_name, browser_folder), records) in enumerate(zip(browser_paths, records_lists)):
             progress = 10 + (i * 70 // max(len(browser_paths), 1))
             
             # Обновляем UI (если нужно)
-            ui_redraw = self.__parameters.get('UIREDRAW')
             if ui_redraw:
-                import asyncio
-                asyncio.create_task(ui_redraw(f'Проверка {browser_name}...', progress))
+                await ui_redraw(f'Проверка {browser_name}...', progress)
             
-            self.__parameters.get('LOG').Info('ChromiumHistory', f'Найден браузер: {browser_name}')
-            records = self.history_parser.parse_history_file(history_path, browser_name)
             all_records.extend(records)
-            print(f"Найдено записей в {browser_name}: {len(records)}")
+            log.Debug('ChromiumHistory', f'Найдено записей в {browser_name}: {len(records)}')
         
         return all_records
 
@@ -122,10 +133,6 @@ class Parser:
         self.__parameters = parameters
         self.history_processor = HistoryProcessor(parameters)
         
-    def _convert_chrome_time(self, chrome_timestamp: int) -> str:
-        """Конвертирует Chromium timestamp в читаемую дату"""
-        return convert_chrome_time.convert_chrome_time(chrome_timestamp)
-
     def _parse_chrome_history(self, history_path: str, browser_name: str) -> List[Tuple]:
         """Парсинг истории браузера"""
         return self.history_processor.history_parser.parse_history_file(history_path, browser_name)
@@ -133,6 +140,8 @@ class Parser:
     async def Start(self) -> Dict:
         storage = self.__parameters.get('STORAGE')
         output_writer = self.__parameters.get('OUTPUTWRITER')
+        ui_redraw = self.__parameters.get('UIREDRAW')
+        module_name = self.__parameters.get('MODULENAME')
         
         if not self.__parameters.get('DBCONNECTION').IsConnected():
             return {}
@@ -171,25 +180,24 @@ class Parser:
         output_writer.SetFields(fields_description, record_fields)
         output_writer.CreateDatabaseTables()
         
-        await self.__parameters.get('UIREDRAW')('Поиск браузеров Chromium...', 10)
+        await ui_redraw('Поиск браузеров Chromium...', 10)
         
         # Обработка всех браузеров
-        all_records = self.history_processor.process_all_browsers()
+        all_records = await self.history_processor.process_all_browsers()
         
         # Запись результатов
-        await self.__parameters.get('UIREDRAW')('Запись результатов...', 80)
+        await ui_redraw('Запись результатов...', 80)
         
-        for record in all_records:
-            output_writer.WriteRecord(record)
+        output_writer.WriteRecords(all_records)
         
         # Завершение работы
-        await self.__parameters.get('UIREDRAW')('Формирование БД...', 95)
+        await ui_redraw('Формирование БД...', 95)
         
         output_writer.RemoveTempTables()
-        await output_writer.CreateDatabaseIndexes(self.__parameters.get('MODULENAME'))
+        await output_writer.CreateDatabaseIndexes(module_name)
         
         info_data = {
-            'Name': self.__parameters.get('MODULENAME'),
+            'Name': module_name,
             'Help': HELP_TEXT,
             'Timestamp': self.__parameters.get('CASENAME'),
             'Vendor': 'LabFramework',
@@ -200,6 +208,6 @@ class Parser:
         output_writer.WriteMeta()
         await output_writer.CloseOutput()
         
-        await self.__parameters.get('UIREDRAW')('Завершено!', 100)
+        await ui_redraw('Завершено!', 100)
         
-        return {self.__parameters.get('MODULENAME'): output_writer.GetDBName()}
\ No newline at end of file
+        return {module_name: output_writer.GetDBName()}
\ No newline at end of file